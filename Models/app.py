@@ -1,98 +1,25 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import numpy as np
-import pandas as pd
-from stable_baselines3 import DQN
-from stable_baselines3.common.vec_env import DummyVecEnv
-import gym
 import os
-from gym import spaces
+import sys
+from device_store import get_device_store
+from record_cache import RecordCache
+from similarity_index import SimilarityIndex
+from quantile_sketch import DeviceStats
+from ingest_buffer import IngestBufferFull, WriteBehindBuffer
+from model_registry import ModelRegistry, ModelNotTrainedError, available_device_types, model_path_for
+from training_queue import TrainingQueue
+from micro_batcher import MicroBatcher
+from prediction_cache import PredictionCache
+from suggestion_rules import generate_suggestions, generate_suggestions_batch, suggestion_codes_batch
+from binary_format import BINARY_CONTENT_TYPE, BinaryFormatError, decode_request, encode_response
+from device_schema import DEVICE_SCHEMAS, core_fields
+from scoring import make_env, score_observations
 
 app = Flask(__name__)
 CORS(app)
 
-# Define a custom environment for RL
-class ElectronicsEnv(gym.Env):
-    def __init__(self, device_type):
-        super(ElectronicsEnv, self).__init__()
-        self.device_type = device_type
-
-        # Define observation space based on device type
-        if self.device_type == "Laptop":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(5,), dtype=np.float32)
-        elif self.device_type == "Smartphone":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Tablet":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(5,), dtype=np.float32)
-        elif self.device_type == "Desktop Computer":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Smartwatch":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "E-Reader":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(5,), dtype=np.float32)
-        elif self.device_type == "Wearable Fitness Tracker":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Television":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Digital Camera":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Wireless/Bluetooth Earbuds":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Headphones":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Portable Bluetooth Speaker":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Home Theater System":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Soundbar":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Printer":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Scanner":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Smart Home Assistant":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        else:
-            raise ValueError("Unsupported device type.")
-
-        # Define action space
-        self.action_space = spaces.Discrete(3)  # 0 = reduce usage, 1 = maintenance, 2 = upgrade
-
-        # Initial state
-        self.state = None
-
-    def reset(self):
-        # Reset state based on device type
-        self.state = np.random.uniform(low=self.observation_space.low, high=self.observation_space.high, size=self.observation_space.shape)
-        return self.state
-
-    def step(self, action):
-        sustainability, lifespan = self.state[:2]
-        if action == 0:  # Reduce usage
-            sustainability += np.random.uniform(1, 5)
-            lifespan += np.random.uniform(0.5, 1.5)
-        elif action == 1:  # Maintenance
-            sustainability += np.random.uniform(3, 8)
-        elif action == 2:  # Upgrade
-            lifespan += np.random.uniform(1, 3)
-
-        sustainability = np.clip(sustainability, 0, 100)
-        lifespan = np.clip(lifespan, 0, 10)  # Ensure lifespan remains in the valid range after updates
-
-        self.state = np.clip(np.array([sustainability, lifespan] + list(self.state[2:])), self.observation_space.low, self.observation_space.high)
-        reward = 0.7 * sustainability + 0.3 * lifespan  # Weighted to prioritize sustainability
-        done = False
-        return self.state, reward, done, {}
-
-# Map condition to numeric value
-def condition_map(condition):
-    mapping = {"new": 100, "good": 75, "fair": 50, "poor": 25}
-    return mapping.get(condition, 50)
-
-def resolution_map(resolution):
-    mapping = {"1080p": 50, "4k": 100}
-    return mapping.get(resolution, 50)
-
 def get_valid_input(prompt, dtype, min_val=None, max_val=None, valid_options=None):
     while True:
         user_input = input(prompt).strip()
@@ -104,11 +31,6 @@ def get_valid_input(prompt, dtype, min_val=None, max_val=None, valid_options=Non
 
             if user_input_lower in valid_options_lower:
                 original_value = valid_options[valid_options_lower.index(user_input_lower)]  # Keep original capitalization
-
-                # If condition mapping is needed, return its numeric equivalent
-                if "condition" in prompt.lower():  
-                    return condition_map(user_input_lower)
-
                 return original_value  # Return the correctly capitalized string
                 
             print(f"Invalid input! Please enter one of: {', '.join(valid_options)}")
@@ -123,465 +45,75 @@ def get_valid_input(prompt, dtype, min_val=None, max_val=None, valid_options=Non
             except ValueError:
                 print(f"Invalid input! Please enter a valid {dtype.__name__}.")
                 
-device_questions = {
-    "Laptop": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-               ("Battery Health (%)", float), ("RAM Size (GB)", float), ("Device Age (years)", float)],
-
-    "Smartphone": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                   ("Battery Health (%)", float), ("Storage Size (GB)", float)],
-
-    "Tablet": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-               ("Battery Health (%)", float), ("Screen Size (inches)", float), ("Device Age (years)", float)],
-
-    "Desktop Computer": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                         ("Power Usage (Watts)", float), ("Device Age (years)", float)],
-
-    "Smartwatch": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                   ("Battery Health (%)", float), ("Device Age (years)", float)],
-
-    "E-Reader": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                 ("Battery Health (%)", float), ("Storage Size (GB)", float), ("Device Age (years)", float)],
-
-    "Wearable Fitness Tracker": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                                 ("Battery Health (%)", float), ("Average Daily Steps Tracked", int)],  
-
-    "Television": [("Screen Size (inches)", float), ("Resolution (e.g., 1080p, 4K)", str),
-                   ("Device Age (years)", float), ("Condition (New/Good/Fair/Poor)", str)],
-
-    "Digital Camera": [("Megapixels", float), ("Condition (New/Good/Fair/Poor)", str),
-                       ("Device Age (years)", float), ("Usage (hours per month)", float)],
-
-    "Printer": [("Monthly Usage (pages printed)", float), ("Condition (New/Good/Fair/Poor)", str),
-                ("Device Age (years)", float)],
-
-    "Scanner": [("Monthly Usage (pages scanned)", float), ("Condition (New/Good/Fair/Poor)", str),
-                ("Device Age (years)", float)],
-
-    "Smart Home Assistant": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                             ("Device Age (years)", float)],
-
-    "Wireless/Bluetooth Earbuds": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str), 
-                                    ("Battery Health (%)", float)],
-
-    "Headphones": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                   ("Battery Health (%)", float)],
-
-    "Portable Bluetooth Speaker": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                                   ("Battery Health (%)", float)],
-
-    "Home Theater System": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                            ("Speaker Wattage (W)", float)],
-
-    "Soundbar": [("Daily Usage (hours)", float), ("Condition (New/Good/Fair/Poor)", str),
-                 ("Speaker Wattage (W)", float)]
-}
 
 def get_device_inputs(device_type):
-    if device_type not in device_questions:
+    if device_type not in DEVICE_SCHEMAS:
         raise ValueError("Device type not recognized!")
 
+    # Prompts, ranges and option codes come from the device schema
     responses = []
-    for question, dtype, *constraints in device_questions[device_type]:
-        # Define constraints for specific inputs
-        if "Daily Usage" in question:
-            value = get_valid_input(f"{question} (0-24): ", dtype, 0, 24)
-        elif "Battery Health" in question:
-            value = get_valid_input(f"{question} (0-100%): ", dtype, 0, 100)
-        elif "Device Age" in question:
-            value = get_valid_input(f"{question} (0-20 years): ", dtype, 0, 20)
-        elif "RAM Size" in question:
-            value = get_valid_input(f"{question} (1-128 GB): ", dtype, 1, 128)
-        elif "Storage Size" in question:
-            value = get_valid_input(f"{question} (8-2048 GB): ", dtype, 8, 2048)
-        elif "Screen Size" in question:
-            value = get_valid_input(f"{question} (5-100 inches): ", dtype, 5, 100)
-        elif "Megapixels" in question:
-            value = get_valid_input(f"{question} (1-108 MP): ", dtype, 1, 108)
-        elif "Condition" in question:
-            value = get_valid_input(f"{question} (New/Good/Fair/Poor): ", str, valid_options=["New", "Good", "Fair", "Poor"])
-            value = condition_map(value)  
-        elif "Resolution" in question:
-            value = get_valid_input(f"{question} (1080p/4K): ", str, valid_options=["1080p", "4K"])
-            value = resolution_map(value.lower())  
-        elif "Power Usage" in question:
-            value = get_valid_input(f"{question} (10-1000 Watts): ", dtype, 10, 1000)
-        elif "Steps" in question:
-            value = get_valid_input(f"{question} (0-50000 steps): ", dtype, 0, 50000)
-        elif "Pages printed" in question or "Pages scanned" in question:
-            value = get_valid_input(f"{question} (0-10000 pages): ", dtype, 0, 10000)
-        elif "Usage (hours per month)" in question:
-            value = get_valid_input(f"{question} (0-720 hours): ", dtype, 0, 720)
+    for spec in DEVICE_SCHEMAS[device_type].specs:
+        if spec.options:
+            value = get_valid_input(spec.prompt, str, valid_options=[option for option, _ in spec.options])
+            value = spec.codes[value.lower()]
         else:
-            value = get_valid_input(f"{question}: ", dtype)  # Default case (no constraints)
-
+            value = get_valid_input(spec.prompt, spec.dtype, spec.low, spec.high)
         responses.append(value)
 
     return np.array(responses)
 
 
-def generate_suggestions(device_type, sustainability, lifespan, user_input):
-    suggestions = []
-    
-    if device_type == "Smartwatch":
-        usage, condition, battery, age = user_input
-        if battery < 50:
-            suggestions.append("Consider replacing the battery to improve device performance.")
-        if age > 3:
-            suggestions.append("Upgrade to a newer model if the current device is slow or unsupported.")
-        if usage > 16:
-            suggestions.append("Reduce daily usage to extend the lifespan and improve sustainability.")
-        if sustainability < 50:
-            suggestions.append("Perform regular maintenance or software updates to enhance sustainability.")
-
-    elif device_type == "Laptop":
-        usage, condition, battery, ram, age = user_input
-        if battery < 40:
-            suggestions.append("Replace the battery to prevent frequent charging.")
-        if ram < 8:
-            suggestions.append("Consider upgrading the RAM for better performance.")
-        if age > 5:
-            suggestions.append("Evaluate if a newer model would be more energy-efficient.")
-        if usage > 10:
-            suggestions.append("Optimize daily usage by closing unnecessary programs or lowering screen brightness.")
-
-    elif device_type == "Smartphone":
-        usage, condition, battery, storage = user_input
-        if battery < 50:
-            suggestions.append("Replace the battery if the device frequently shuts down.")
-        if storage < 32:
-            suggestions.append("Clear unnecessary files or upgrade storage for better performance.")
-        if usage > 12:
-            suggestions.append("Reduce screen time to prevent overheating and extend lifespan.")
-        if sustainability < 50:
-            suggestions.append("Regularly update the operating system and apps for improved efficiency.")
-
-    elif device_type == "Tablet":
-        usage, condition, battery, screen_size, age = user_input
-        if battery < 50:
-            suggestions.append("Replace the battery to improve daily performance.")
-        if screen_size > 12:
-            suggestions.append("Consider using a smaller screen size to save energy.")
-        if age > 4:
-            suggestions.append("Upgrade to a newer model with better energy efficiency.")
-        if sustainability < 50:
-            suggestions.append("Use a screen protector and clean the screen regularly to maintain usability.")
-
-    elif device_type == "Desktop Computer":
-        usage, condition, power_usage, age = user_input
-        if power_usage > 200:
-            suggestions.append("Consider upgrading to an energy-efficient power supply unit.")
-        if age > 7:
-            suggestions.append("Upgrade hardware components or consider replacing the device.")
-        if usage > 12:
-            suggestions.append("Turn off the device when not in use to save energy.")
-        if sustainability < 50:
-            suggestions.append("Clean the fans and ensure proper ventilation to improve performance.")
-
-    elif device_type == "E-Reader":
-        usage, condition, battery, storage, age = user_input
-        if battery < 60:
-            suggestions.append("Replace the battery to ensure longer reading hours.")
-        if age > 4:
-            suggestions.append("Upgrade to a newer model for improved readability.")
-        if sustainability < 50:
-            suggestions.append("Keep the screen clean and avoid exposing it to extreme conditions.")
-
-    elif device_type == "Wearable Fitness Tracker":
-        usage, condition, battery, steps = user_input
-        if battery < 50:
-            suggestions.append("Replace the battery for uninterrupted tracking.")
-        if steps < 5000:
-            suggestions.append("Increase physical activity to make better use of the tracker.")
-        if sustainability < 50:
-            suggestions.append("Regularly clean the strap and ensure proper syncing with your phone.")
-
-    elif device_type == "Television":
-        screen_size, resolution, age, condition = user_input
-        if age > 7:
-            suggestions.append("Upgrade to a newer, energy-efficient model.")
-        if resolution < 50:
-            suggestions.append("Consider upgrading to a higher-resolution TV for better experience.")
-        if sustainability < 50:
-            suggestions.append("Clean the screen regularly and use energy-saving modes.")
-
-    elif device_type == "Digital Camera":
-        megapixels, condition, age, usage = user_input
-        if megapixels < 12:
-            suggestions.append("Consider upgrading to a higher-megapixel camera.")
-        if age > 5:
-            suggestions.append("Evaluate if a newer model with better features would suit your needs.")
-        if usage > 40:
-            suggestions.append("Avoid excessive use to prevent overheating and wear.")
-        if sustainability < 50:
-            suggestions.append("Store the camera in a dust-free environment and handle it carefully.")
-
-    elif device_type == "Printer":
-        usage, condition, age = user_input
-        if usage > 1000:
-            suggestions.append("Use duplex printing to save paper and reduce wear.")
-        if age > 6:
-            suggestions.append("Consider replacing the printer with an energy-efficient model.")
-        if sustainability < 50:
-            suggestions.append("Clean the ink heads and perform regular maintenance.")
-
-    elif device_type == "Scanner":
-        usage, condition, age = user_input
-        if usage > 500:
-            suggestions.append("Avoid scanning unnecessary documents to reduce wear.")
-        if age > 5:
-            suggestions.append("Upgrade to a more efficient scanner.")
-        if sustainability < 50:
-            suggestions.append("Ensure the scanner is properly aligned and cleaned.")
-
-    elif device_type == "Smart Home Assistant":
-        usage, condition, age = user_input
-        if age > 5:
-            suggestions.append("Consider upgrading to the latest version for enhanced features.")
-        if sustainability < 50:
-            suggestions.append("Keep the device clean and ensure software updates are installed.")
-        if usage > 10:
-            suggestions.append("Reduce daily usage to save energy.")
-
-    else:
-        suggestions.append("Your device seems to be in good condition. Keep up the good maintenance!")
-    
-    return suggestions
-
 def save_device_data(device_type, user_input):
-    folder_path = "device_data"  # Define folder name
-    file_path = f"{folder_path}/{device_type}_data.xlsx"
-
-    # Create folder if it doesn't exist
-    if not os.path.exists(folder_path):
-        os.makedirs(folder_path)
-
-    # Convert user input to a DataFrame row
-    new_data = pd.DataFrame([user_input])
-
-    if os.path.exists(file_path):
-        df = pd.read_excel(file_path)
-        df = pd.concat([df, new_data], ignore_index=True)  # Append new data
+    # Load the cached records and statistics before this one reaches the store, so it is counted once
+    record_cache.matrix(device_type)
+    device_stats.load(device_type)
+
+    if ingest_buffer is not None:
+        # Written by the background flusher; the request only pays for the enqueue
+        ingest_buffer.enqueue(device_type, user_input)
+        print(f"Data queued for {device_type}")
     else:
-        df = new_data  # Create new file if none exists
-
-    df.to_excel(file_path, index=False)
-    print(f"Data saved for {device_type} at {file_path}")
+        # Appends one record; the cost does not grow with the number of stored rows
+        device_store.append(device_type, user_input)
+        print(f"Data saved for {device_type} in the {type(device_store).__name__}")
 
-    return df
+    record_cache.append(device_type, user_input)
+    device_stats.update(device_type, user_input)
 
 
 def compare_with_saved_data(device_type, user_input):
-    file_path = f"device_data/{device_type}_data.xlsx"
+    # L1 distance to every saved record in one vectorized pass over the cached matrix
+    match = record_cache.nearest(device_type, user_input)
 
-    if not os.path.exists(file_path):
+    if match is None:
         print(f"No previous data found for {device_type}.")
         return None
 
-    df = pd.read_excel(file_path)
-    print(f"Comparing new {device_type} data with {len(df)} previous records...")
+    print(f"Compared new {device_type} data with {record_cache.count(device_type)} previous records...")
 
-    # Compute differences with each saved device record
-    comparisons = df.apply(lambda row: sum(abs(row - user_input)), axis=1)
-
-    # Find the closest match (smallest difference)
-    closest_match_index = comparisons.idxmin()
-    closest_match = df.iloc[closest_match_index]
+    # Closest match (smallest difference)
+    closest_match_index, _ = match
+    closest_match = record_cache.record(device_type, closest_match_index)
 
     print(f"Closest {device_type} match found:\n{closest_match}")
     return closest_match
 
 # Main function
 
-device_inputs = {
-    "Laptop": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "RAM Size (GB)", "Device Age (years)"],
-    "Tablet": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Screen Size (inches)", "Device Age (years)"],
-    "Smartphone": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Storage Size (GB)"],
-    "Desktop Computer": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Power Usage (Watts)", "Device Age (years)"],
-    "Smartwatch": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Device Age (years)"],
-    "E-Reader": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Storage Size (GB)", "Device Age (years)"],
-    "Wearable Fitness Tracker": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Average Daily Steps Tracked"],
-    "Television": ["Screen Size (inches)", "Resolution (e.g., 1080p, 4K)", "Device Age (years)", "Condition(New/Good/Fair/Poor)"],
-    "Digital Camera": ["Megapixels", "Condition (New/Good/Fair/Poor)", "Device Age (years)", "Usage (hours per month)"],
-    "Printer": ["Monthly Usage (pages printed)", "Condition(New/Good/Fair/Poor)", "Device Age (years)"],
-    "Scanner": ["Monthly Usage (pages scanned)", "Condition(New/Good/Fair/Poor)", "Device Age (years)"],
-    "Smart Home Assistant": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Device Age (years)"],
-    "Headphones": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
-    "Wireless/Bluetooth Earbuds": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
-    "Portable Bluetooth Speaker": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
-    "Home Theater System": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
-    "Soundbar": ["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"]
-}
-
-device_inputs_duplicate = {
-    "Laptop": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "RAM Size (GB)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Storage Size (GB)",
-        "Processor Type",
-        "Operating System"
-    ],
-    "Tablet": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Screen Size (inches)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Storage Size (GB)",
-        "Operating System"
-    ],
-    "Smartphone": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Storage Size (GB)",
-        "Brand",
-        "Model",
-        "RAM Size (GB)",
-        "Operating System",
-        "Device Age (years)"
-    ],
-    "Desktop Computer": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Power Usage (Watts)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "RAM Size (GB)",
-        "Storage Size (GB)",
-        "Processor Type",
-        "Operating System"
-    ],
-    "Smartwatch": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Screen Size (inches)"
-    ],
-    "E-Reader": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Storage Size (GB)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Screen Type (e.g., e-ink)"
-    ],
-    "Wearable Fitness Tracker": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Average Daily Steps Tracked",
-        "Brand",
-        "Model",
-        "Heart Rate Monitor (Yes/No)",
-        "Device Age (years)"
-    ],
-    "Television": [
-        "Screen Size (inches)",
-        "Resolution (e.g., 1080p, 4K)",
-        "Device Age (years)",
-        "Condition(New/Good/Fair/Poor)",
-        "Brand",
-        "Model",
-        "Display Technology (LED/LCD/OLED)",
-        "Smart TV (Yes/No)"
-    ],
-    "Digital Camera": [
-        "Megapixels",
-        "Condition (New/Good/Fair/Poor)",
-        "Device Age (years)",
-        "Usage (hours per month)",
-        "Brand",
-        "Model",
-        "Sensor Type (e.g., CMOS)",
-        "Lens Type (Interchangeable/Fixed)"
-    ],
-    "Printer": [
-        "Monthly Usage (pages printed)",
-        "Condition(New/Good/Fair/Poor)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Type (Inkjet/Laser)",
-        "Color Printing (Yes/No)"
-    ],
-    "Scanner": [
-        "Monthly Usage (pages scanned)",
-        "Condition(New/Good/Fair/Poor)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Scan Resolution (DPI)"
-    ],
-    "Smart Home Assistant": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Device Age (years)",
-        "Brand",
-        "Model",
-        "Voice Assistant (e.g., Alexa/Google/Siri)"
-    ],
-    "Headphones": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Brand",
-        "Model",
-        "Type (Wired/Wireless)",
-        "Noise Cancelling (Yes/No)",
-        "Device Age (years)"
-    ],
-    "Wireless/Bluetooth Earbuds": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Brand",
-        "Model",
-        "Noise Cancelling (Yes/No)",
-        "Device Age (years)"
-    ],
-    "Portable Bluetooth Speaker": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Brand",
-        "Model",
-        "Waterproof (Yes/No)",
-        "Device Age (years)"
-    ],
-    "Home Theater System": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Brand",
-        "Model",
-        "Number of Speakers",
-        "Power Consumption (Watts)",
-        "Device Age (years)"
-    ],
-    "Soundbar": [
-        "Daily Usage (hours)",
-        "Condition(New/Good/Fair/Poor)",
-        "Battery Health (%)",
-        "Brand",
-        "Model",
-        "Subwoofer Included (Yes/No)",
-        "Bluetooth Enabled (Yes/No)",
-        "Device Age (years)"
-    ]
-}
+# Field lists per device type, from the device schema registry
+device_inputs = core_fields()
+
+# Device records are stored with one column per core input field
+device_store = get_device_store(device_inputs)
+record_cache = RecordCache(device_store)
+similarity_index = SimilarityIndex(record_cache)
+device_stats = DeviceStats(record_cache)
+
+# Records are persisted off the request path unless WRITE_BEHIND=0
+ingest_buffer = WriteBehindBuffer(device_store) if os.environ.get("WRITE_BEHIND", "1") != "0" else None
+
+# Every input the API accepts: the core fields followed by descriptive extras
+device_inputs_duplicate = {device_type: schema.input_fields for device_type, schema in DEVICE_SCHEMAS.items()}
 
 
 
@@ -600,21 +132,87 @@ def select_device():
         "input_fields": input_fields
     })
 
-def convert_input(user_input):
-    valid_conditions = {"new", "good", "fair", "poor"}
-    new_input = []
-    
-    for item in user_input:
-        if isinstance(item, str) and item.lower() in valid_conditions:
-            new_input.append(float(condition_map(item)))
-        else:
-            try:
-                new_input.append(float(item))
-            except ValueError:
-                # fallback if something unexpected is there
-                new_input.append(0.0)
-    
-    return new_input
+def select_core_inputs(device_type, input_values):
+    # Gather the core fields from the API inputs and encode them in one pass
+    return DEVICE_SCHEMAS[device_type].encode([input_values])[0]
+
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 10000))
+MAX_SIMILAR_RESULTS = int(os.environ.get("MAX_SIMILAR_RESULTS", 100))
+
+model_registry = ModelRegistry(make_env)
+
+# Untrained device types are trained off the request path
+training_queue = TrainingQueue(make_env, model_path_for, on_complete=model_registry.warm)
+
+def read_binary_request():
+    # Device type and (N, d) float32 core values of an application/x-eepb body
+    device_type, values = decode_request(request.get_data())
+    if device_type not in DEVICE_SCHEMAS:
+        raise BinaryFormatError("Invalid or missing device type")
+    if values.shape[1] != len(DEVICE_SCHEMAS[device_type].fields):
+        raise BinaryFormatError("Input count does not match expected for device type")
+    return device_type, values
+
+def binary_response(device_type, sustainability, lifespan, features):
+    # Scores and suggestion rule bitmasks in the binary format
+    codes = suggestion_codes_batch(device_type, sustainability, features)
+    return Response(encode_response(sustainability, lifespan, codes), mimetype=BINARY_CONTENT_TYPE)
+
+def training_response(device_type):
+    job = training_queue.submit(device_type)
+    return jsonify({
+        "device_type": device_type,
+        "status": "training",
+        "job_id": job.id,
+        "status_url": f"/train/status/{job.id}"
+    }), 202
+
+# Warm every saved model before serving when WARMUP_MODELS=1 (or --warmup)
+warmup_enabled = os.environ.get("WARMUP_MODELS") == "1" or "--warmup" in sys.argv
+if warmup_enabled:
+    model_registry.warm_up()
+
+# Batch concurrent /predict calls per device type when MICRO_BATCHING=1
+micro_batcher = None
+if os.environ.get("MICRO_BATCHING") == "1":
+    micro_batcher = MicroBatcher(lambda device_type, observations: score_observations(model_registry.get(device_type), observations))
+
+# Cache of /predict results; PREDICTION_CACHE_SIZE=0 disables it
+prediction_cache = PredictionCache() if int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)) > 0 else None
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(prediction_cache.stats(), enabled=True))
+
+@app.route('/models', methods=['GET'])
+def models():
+    return jsonify({
+        "backend": model_registry.backend,
+        "models": model_registry.describe()
+    })
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    expected = available_device_types()
+    warm = model_registry.warm_device_types()
+    pending = [device_type for device_type in expected if device_type not in warm]
+    # Without warm-up, models load on their first request, so the instance is ready right away
+    ready = not pending or not warmup_enabled
+    return jsonify({
+        "ready": ready,
+        "warmup": warmup_enabled,
+        "warm": warm,
+        "pending": pending
+    }), 200 if ready else 503
+
+@app.route('/train/status/<job_id>', methods=['GET'])
+def training_status(job_id):
+    job = training_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown training job"}), 404
+    return jsonify(job.to_dict())
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -649,52 +247,46 @@ def predict():
         # # user_input = get_device_inputs(device_type)
         # user_input= data.get("inputs")
 
-        data = request.get_json()
+        binary = request.mimetype == BINARY_CONTENT_TYPE
+        if binary:
+            # Encoded core values, read straight from the body
+            try:
+                device_type, values = read_binary_request()
+            except BinaryFormatError as e:
+                return jsonify({"error": str(e)}), 400
+            if len(values) != 1:
+                return jsonify({"error": "Binary /predict takes exactly one row, use /predict/batch"}), 400
+            schema = DEVICE_SCHEMAS[device_type]
+            user_input = values[0].astype(np.float64)
+        else:
+            data = request.get_json()
 
-        if not data:
-            return jsonify({"error": "No input data provided"}), 400
+            if not data:
+                return jsonify({"error": "No input data provided"}), 400
 
-        device_type = data.get("device_type")
-        input_values = data.get("inputs")
+            device_type = data.get("device_type")
+            input_values = data.get("inputs")
 
-        if not device_type or device_type not in device_inputs_duplicate:
-            return jsonify({"error": "Invalid or missing device type"}), 400
-
-        extended_fields = device_inputs_duplicate[device_type]
-        core_fields = device_inputs[device_type]
+            if not device_type or device_type not in DEVICE_SCHEMAS:
+                return jsonify({"error": "Invalid or missing device type"}), 400
 
-        if len(input_values) != len(extended_fields):
-            return jsonify({"error": "Input count does not match expected for device type"}), 400
+            schema = DEVICE_SCHEMAS[device_type]
 
-        # Map all inputs from duplicate to field names
-        input_map = dict(zip(extended_fields, input_values))
+            if not isinstance(input_values, list) or len(input_values) != schema.n_inputs:
+                return jsonify({"error": "Input count does not match expected for device type"}), 400
 
-        # Filter out only the original fields from core inputs
-        user_input = {field: input_map[field] for field in core_fields if field in input_map}
-        user_input = convert_input(user_input)
+            # Filter out only the original fields from core inputs
+            user_input = select_core_inputs(device_type, input_values)
         print(f"User input for {device_type}: {user_input}")
-        if not user_input:
-            return jsonify({"error": "No inputs provided"}), 400
-
-        # Initialize environment and train model
-        def train_or_load_model(device_type, env):
-            model_path = f"saved_models/{device_type}_model.zip"
-
-            if os.path.exists(model_path):
-                print(f"Loading existing model for {device_type}...")
-                model = DQN.load(model_path, env=env)  # Load model with the environment
-            else:
-                print(f"Training a new model for {device_type}...")
-                model = DQN("MlpPolicy", env, verbose=1)
-                model.learn(total_timesteps=10000)
-                model.save(model_path)  # Save after training
-                print(f"Model saved at {model_path}")
-
-            return model
+        error = schema.validate(user_input[None])
+        if error is not None:
+            return jsonify({"error": error[1]}), 400
 
-        # Instead of retraining every time
-        env = DummyVecEnv([lambda: ElectronicsEnv(device_type)])
-        model = train_or_load_model(device_type, env)
+        # Loaded once per process and reused across requests
+        try:
+            model = model_registry.get(device_type)
+        except ModelNotTrainedError:
+            return training_response(device_type)
 
         # Compare new input with past device values
         print(f"Comparing new {device_type} data with past records...")
@@ -706,17 +298,30 @@ def predict():
 
         # Predict sustainability and lifespan
         print(f"Predicting sustainability and lifespan for {device_type}...")
-        obs = np.clip(user_input, env.observation_space.low, env.observation_space.high).astype(np.float32)
-        action, _ = model.predict(obs, deterministic=True)
+        cache_key = None
+        cached = None
+        if prediction_cache is not None:
+            cache_key = prediction_cache.make_key(device_type, model.version, user_input)
+            cached = prediction_cache.get(cache_key)
+
+        if cached is not None:
+            sustainability, lifespan, suggestions = cached
+        else:
+            if micro_batcher is not None:
+                # Evaluated together with concurrent requests for the same device type
+                _, sustainability, lifespan = micro_batcher.submit(device_type, user_input).result()
+            else:
+                _, sustainability, lifespan = (output[0] for output in score_observations(model, np.array([user_input])))
 
-        sustainability = obs[0] + 10 * action
-        lifespan = obs[1] / 10 + 2 * action  # Dividing by 10 scales condition to a range of 0-10.
+            # Generate suggestions
+            suggestions = generate_suggestions(device_type, sustainability, lifespan, user_input)
+            if prediction_cache is not None:
+                prediction_cache.put(cache_key, (sustainability, lifespan, suggestions))
 
         print(f"\nPredicted Sustainability: {sustainability:.2f}")
         print(f"Predicted Lifespan: {lifespan:.2f} years")
 
-        # Generate and display suggestions
-        suggestions = generate_suggestions(device_type, sustainability, lifespan, user_input)
+        # Display suggestions
         if suggestions:
             print("\nSuggestions to Improve Sustainability and Lifespan:")
             for suggestion in suggestions:
@@ -724,6 +329,8 @@ def predict():
         else:
             print("\nNo specific suggestions. Your device seems to be in good condition!")
 
+        if binary:
+            return binary_response(device_type, [sustainability], [lifespan], user_input[None])
 
         return jsonify({
             "device_type": device_type,
@@ -731,6 +338,165 @@ def predict():
             "lifespan": round(lifespan, 2),
             "suggestions": suggestions
         })
+    except IngestBufferFull as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        binary = request.mimetype == BINARY_CONTENT_TYPE
+        if binary:
+            # Encoded core values as a zero-copy view of the body
+            try:
+                device_type, user_inputs = read_binary_request()
+            except BinaryFormatError as e:
+                return jsonify({"error": str(e)}), 400
+            if not len(user_inputs):
+                return jsonify({"error": "Inputs must be a non-empty list of input lists"}), 400
+            if len(user_inputs) > MAX_BATCH_SIZE:
+                return jsonify({"error": f"Batch size exceeds the limit of {MAX_BATCH_SIZE}"}), 400
+            schema = DEVICE_SCHEMAS[device_type]
+        else:
+            data = request.get_json()
+
+            if not data:
+                return jsonify({"error": "No input data provided"}), 400
+
+            device_type = data.get("device_type")
+            input_rows = data.get("inputs")
+
+            if not device_type or device_type not in DEVICE_SCHEMAS:
+                return jsonify({"error": "Invalid or missing device type"}), 400
+
+            if not isinstance(input_rows, list) or not input_rows:
+                return jsonify({"error": "Inputs must be a non-empty list of input lists"}), 400
+
+            if len(input_rows) > MAX_BATCH_SIZE:
+                return jsonify({"error": f"Batch size exceeds the limit of {MAX_BATCH_SIZE}"}), 400
+
+            schema = DEVICE_SCHEMAS[device_type]
+            for i, input_values in enumerate(input_rows):
+                if not isinstance(input_values, list) or len(input_values) != schema.n_inputs:
+                    return jsonify({"error": f"Input count does not match expected for device type (row {i})"}), 400
+
+            # Gather and encode the core fields of every row at once
+            user_inputs = schema.encode(input_rows)
+
+        error = schema.validate(user_inputs)
+        if error is not None:
+            return jsonify({"error": f"{error[1]} (row {error[0]})"}), 400
+
+        # One forward pass for the whole batch
+        try:
+            model = model_registry.get(device_type)
+        except ModelNotTrainedError:
+            return training_response(device_type)
+        _, sustainability, lifespan = score_observations(model, user_inputs)
+
+        if binary:
+            return binary_response(device_type, sustainability, lifespan, user_inputs)
+
+        # Suggestion rules are evaluated for the whole batch at once
+        suggestions = generate_suggestions_batch(device_type, sustainability, user_inputs)
+
+        results = []
+        for row_sustainability, row_lifespan, row_suggestions in zip(sustainability, lifespan, suggestions):
+            results.append({
+                "sustainability": round(float(row_sustainability), 2),
+                "lifespan": round(float(row_lifespan), 2),
+                "suggestions": row_suggestions
+            })
+
+        return jsonify({
+            "device_type": device_type,
+            "count": len(results),
+            "results": results
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/similar', methods=['POST'])
+def similar():
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "No input data provided"}), 400
+
+        device_type = data.get("device_type")
+        input_values = data.get("inputs")
+
+        if not device_type or device_type not in DEVICE_SCHEMAS:
+            return jsonify({"error": "Invalid or missing device type"}), 400
+
+        if not isinstance(input_values, list) or len(input_values) != DEVICE_SCHEMAS[device_type].n_inputs:
+            return jsonify({"error": "Input count does not match expected for device type"}), 400
+
+        k = data.get("k", 5)
+        if not isinstance(k, int) or not 1 <= k <= MAX_SIMILAR_RESULTS:
+            return jsonify({"error": f"k must be an integer between 1 and {MAX_SIMILAR_RESULTS}"}), 400
+
+        filters = data.get("filters")
+        if filters is not None and not isinstance(filters, dict):
+            return jsonify({"error": "Filters must be an object of field conditions"}), 400
+
+        user_input = select_core_inputs(device_type, input_values)
+        error = DEVICE_SCHEMAS[device_type].validate(user_input[None])
+        if error is not None:
+            return jsonify({"error": error[1]}), 400
+        try:
+            matches = similarity_index.query(device_type, user_input, k, bool(data.get("normalize", False)), filters)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = []
+        for index, distance in matches:
+            record = record_cache.record(device_type, index)
+            results.append({
+                "distance": round(distance, 4),
+                "record": {field: float(value) for field, value in record.items()}
+            })
+
+        return jsonify({
+            "device_type": device_type,
+            "k": k,
+            "results": results
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/stats', methods=['POST'])
+def stats():
+    try:
+        data = request.get_json()
+
+        if not data:
+            return jsonify({"error": "No input data provided"}), 400
+
+        device_type = data.get("device_type")
+        input_values = data.get("inputs")
+
+        if not device_type or device_type not in DEVICE_SCHEMAS:
+            return jsonify({"error": "Invalid or missing device type"}), 400
+
+        # Inputs are optional; without them only the population summaries are returned
+        user_input = None
+        if input_values is not None:
+            if not isinstance(input_values, list) or len(input_values) != DEVICE_SCHEMAS[device_type].n_inputs:
+                return jsonify({"error": "Input count does not match expected for device type"}), 400
+            user_input = select_core_inputs(device_type, input_values)
+            error = DEVICE_SCHEMAS[device_type].validate(user_input[None])
+            if error is not None:
+                return jsonify({"error": error[1]}), 400
+
+        features = device_stats.describe(device_type, user_input)
+        return jsonify({
+            "device_type": device_type,
+            "count": max((feature["count"] for feature in features.values()), default=0),
+            "features": features
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
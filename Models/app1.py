@@ -1,90 +1,16 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import numpy as np
 from stable_baselines3 import DQN
 from stable_baselines3.common.vec_env import DummyVecEnv
-import gym
-from gym import spaces
 import json
 import os
+from feedback_store import FeedbackStore
+from scoring import ElectronicsEnv
 
 app = Flask(__name__)
 CORS(app)  # Enables CORS for all routes
 
-# Define a custom environment for RL
-class ElectronicsEnv(gym.Env):
-    def __init__(self, device_type):
-        super(ElectronicsEnv, self).__init__()
-        self.device_type = device_type
-
-        # Define observation space based on device type
-        if self.device_type == "Laptop":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(5,), dtype=np.float32)
-        elif self.device_type == "Smartphone":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Tablet":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(5,), dtype=np.float32)
-        elif self.device_type == "Desktop Computer":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Smartwatch":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "E-Reader":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(5,), dtype=np.float32)
-        elif self.device_type == "Wearable Fitness Tracker":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Television":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Digital Camera":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(4,), dtype=np.float32)
-        elif self.device_type == "Wireless/Bluetooth Earbuds":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Headphones":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Portable Bluetooth Speaker":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Home Theater System":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Soundbar":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Printer":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Scanner":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        elif self.device_type == "Smart Home Assistant":
-            self.observation_space = spaces.Box(low=0, high=100, shape=(3,), dtype=np.float32)
-        else:
-            raise ValueError("Unsupported device type.")
-
-        # Define action space
-        self.action_space = spaces.Discrete(3)  # 0 = reduce usage, 1 = maintenance, 2 = upgrade
-
-        # Initial state
-        self.state = None
-
-    def reset(self):
-        # Reset state based on device type
-        self.state = np.random.uniform(low=self.observation_space.low, high=self.observation_space.high, size=self.observation_space.shape)
-        return self.state
-
-    def step(self, action):
-        sustainability, lifespan = self.state[:2]
-        if action == 0:  # Reduce usage
-            sustainability += np.random.uniform(1, 5)
-            lifespan += np.random.uniform(0.5, 1.5)
-        elif action == 1:  # Maintenance
-            sustainability += np.random.uniform(3, 8)
-        elif action == 2:  # Upgrade
-            lifespan += np.random.uniform(1, 3)
-
-        sustainability = np.clip(sustainability, 0, 100)
-        lifespan = np.clip(lifespan, 0, 10)  # Ensure lifespan remains in the valid range after updates
-
-        self.state = np.clip(np.array([sustainability, lifespan] + list(self.state[2:])), self.observation_space.low, self.observation_space.high)
-        reward = 0.7 * sustainability + 0.3 * lifespan  # Weighted to prioritize sustainability
-        done = False
-        return self.state, reward, done, {}
-
-
 # User input system
 def get_device_inputs(device_type):
     if device_type == "Laptop":
@@ -500,7 +426,10 @@ def predict():
 
 
 
-FEEDBACK_FILE = "feedback.json"
+# Feedback is appended to feedback.jsonl; an old feedback.json is imported once on startup
+FEEDBACK_FILE = "feedback.jsonl"
+LEGACY_FEEDBACK_FILE = "feedback.json"
+feedback_store = FeedbackStore(FEEDBACK_FILE, legacy_path=LEGACY_FEEDBACK_FILE)
 
 @app.route("/feedback", methods=["POST"])
 def feedback():
@@ -518,17 +447,8 @@ def feedback():
         if not description:
             return jsonify({"error": "Description is required"}), 400
 
-        # Load existing feedback data or initialize empty list if file doesn't exist
-        feedback_list = []
-        if os.path.exists(FEEDBACK_FILE):
-            try:
-                with open(FEEDBACK_FILE, "r") as f:
-                    feedback_list = json.load(f)
-            except json.JSONDecodeError:
-                feedback_list = []  # If JSON is corrupt, reset it
-
         # Append new feedback
-        feedback_list.append({
+        feedback_store.append({
             "name": name,
             "email": email,
             "description": description,
@@ -536,29 +456,84 @@ def feedback():
             "suggestions": suggestions
         })
 
-        # Save updated feedback list back to file
-        with open(FEEDBACK_FILE, "w") as f:
-            json.dump(feedback_list, f, indent=4)
-
         return jsonify({"message": "Feedback saved successfully"}), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+FEEDBACK_PAGE_SIZE = int(os.environ.get("FEEDBACK_PAGE_SIZE", 100))
+MAX_FEEDBACK_PAGE_SIZE = int(os.environ.get("MAX_FEEDBACK_PAGE_SIZE", 1000))
+
+def feedback_rating(record):
+    try:
+        return float(record.get("rating"))
+    except (TypeError, ValueError):
+        return None
+
+def matching_feedback(cursor, min_rating):
+    # (index, record) of every feedback record from cursor on that passes the filters
+    for index, record in feedback_store.scan(cursor):
+        if min_rating is not None:
+            rating = feedback_rating(record)
+            if rating is None or rating < min_rating:
+                continue
+        yield index, record
+
 @app.route("/get_feedback", methods=["GET"])
 def get_feedback():
     try:
-        if not os.path.exists(FEEDBACK_FILE):
-            return jsonify({"feedbacks": []}), 200  # Return empty list if file is missing
-
-        with open(FEEDBACK_FILE, "r") as f:
-            feedback_list = json.load(f)
-
-        return jsonify({"feedbacks": feedback_list}), 200
-
-    except json.JSONDecodeError:
-        return jsonify({"feedbacks": []}), 200  # Return empty list if file is corrupt
+        # Listings only change when feedback is appended, so the store version is the ETag
+        etag = f'"{feedback_store.version()}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            return "", 304, {"ETag": etag}
+
+        try:
+            cursor = int(request.args.get("cursor", 0))
+            limit = request.args.get("limit")
+            limit = int(limit) if limit is not None else None
+            min_rating = request.args.get("min_rating")
+            min_rating = float(min_rating) if min_rating is not None else None
+        except ValueError:
+            return jsonify({"error": "cursor and limit must be integers and min_rating a number"}), 400
+        if cursor < 0 or (limit is not None and limit < 1):
+            return jsonify({"error": "cursor must be >= 0 and limit >= 1"}), 400
+
+        # format=ndjson streams every match (or up to limit) one record per line
+        if request.args.get("format") == "ndjson":
+            def generate():
+                for n, (index, record) in enumerate(matching_feedback(cursor, min_rating)):
+                    if limit is not None and n >= limit:
+                        break
+                    yield json.dumps(record) + "\n"
+            return Response(generate(), mimetype="application/x-ndjson", headers={"ETag": etag})
+
+        # Without cursor or limit every match is returned, as before pagination;
+        # the list is streamed so it is never built in memory
+        if "cursor" not in request.args and "limit" not in request.args:
+            def generate():
+                yield '{"feedbacks": ['
+                total = 0
+                for index, record in matching_feedback(0, min_rating):
+                    yield ("," if total else "") + json.dumps(record)
+                    total += 1
+                yield f'], "next_cursor": null, "total": {total}}}'
+            return Response(generate(), mimetype="application/json", headers={"ETag": etag})
+
+        limit = min(limit or FEEDBACK_PAGE_SIZE, MAX_FEEDBACK_PAGE_SIZE)
+        feedbacks = []
+        next_cursor = None
+        for index, record in matching_feedback(cursor, min_rating):
+            if len(feedbacks) == limit:
+                next_cursor = index
+                break
+            feedbacks.append(record)
+
+        page = {"feedbacks": feedbacks, "next_cursor": next_cursor}
+        # Counting the matches of a filter would read every record, so the total is left out then
+        if min_rating is None:
+            page["total"] = feedback_store.count()
+        return jsonify(page), 200, {"ETag": etag}
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
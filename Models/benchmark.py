@@ -0,0 +1,162 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Usage (from the Models/ directory):
+#   python benchmark.py --output bench.json
+#   python benchmark.py --train --train-timesteps 2000 --output bench.json
+#   python benchmark.py --compare baseline.json --output bench.json
+
+# One representative device type per observation size
+DEVICES_BY_OBS_SIZE = {3: "Printer", 4: "Smartphone", 5: "Laptop"}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_runs(run, repeats):
+    # Median wall-clock of `repeats` runs after one warm-up run
+    run()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def make_bench_env(wrapper, device_type, n_envs, seed):
+    from scoring import ElectronicsEnv
+
+    if wrapper == "raw":
+        env = ElectronicsEnv(device_type)
+        env.seed(seed)
+        return env
+    if wrapper == "dummy":
+        from stable_baselines3.common.vec_env import DummyVecEnv
+        env = DummyVecEnv([lambda: ElectronicsEnv(device_type) for _ in range(n_envs)])
+    else:
+        from vec_env import BatchedElectronicsVecEnv
+        env = BatchedElectronicsVecEnv(device_type, num_envs=n_envs)
+    env.seed(seed)
+    return env
+
+
+def bench_env(wrapper, device_type, n_envs, steps, repeats, seed):
+    env = make_bench_env(wrapper, device_type, n_envs, seed)
+    actions = np.random.default_rng(seed).integers(0, 3, size=(steps, n_envs))
+
+    def run():
+        env.reset()
+        if wrapper == "raw":
+            for action in actions[:, 0]:
+                env.step(int(action))
+        else:
+            for action in actions:
+                env.step(action)
+
+    seconds = time_runs(run, repeats)
+    return {
+        "wrapper": wrapper,
+        "device_type": device_type,
+        "obs_size": env.observation_space.shape[0],
+        "n_envs": n_envs,
+        "steps": steps,
+        "seconds": seconds,
+        "env_steps_per_sec": steps * n_envs / seconds,
+    }
+
+
+def bench_training(device_type, timesteps, seed):
+    from stable_baselines3.common.vec_env import DummyVecEnv
+    from scoring import ElectronicsEnv
+    from training_queue import train_model
+
+    env = DummyVecEnv([lambda: ElectronicsEnv(device_type)])
+    start = time.perf_counter()
+    train_model(device_type, env, timesteps, seed=seed, verbose=0)
+    seconds = time.perf_counter() - start
+    return {"device_type": device_type, "timesteps": timesteps, "seconds": seconds,
+            "timesteps_per_sec": timesteps / seconds}
+
+
+def env_key(result):
+    return f"{result['wrapper']}/{result['device_type']}/n{result['n_envs']}"
+
+
+def compare(results, baseline):
+    # Print the speed-up of every env and training result that exists in both runs
+    old_env = {env_key(r): r for r in baseline.get("env", [])}
+    for result in results["env"]:
+        old = old_env.get(env_key(result))
+        if old:
+            ratio = result["env_steps_per_sec"] / old["env_steps_per_sec"]
+            print(f"{env_key(result)}: {ratio:.2f}x env steps/sec vs baseline")
+    old_train = {r["device_type"]: r for r in baseline.get("training", [])}
+    for result in results["training"]:
+        old = old_train.get(result["device_type"])
+        if old and old["timesteps"] == result["timesteps"]:
+            print(f"train/{result['device_type']}: {old['seconds'] / result['seconds']:.2f}x faster vs baseline")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ElectronicsEnv step throughput and DQN training time.")
+    parser.add_argument("--wrapper", action="append", choices=["raw", "dummy", "batched"],
+                        help="Env wrappers to benchmark (repeatable). Defaults to all.")
+    parser.add_argument("--n-envs", type=int, action="append", help="Env counts for vectorized wrappers. Defaults to 1, 8, 64.")
+    parser.add_argument("--steps", type=int, default=2000, help="Vectorized steps per run.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per configuration (median is reported).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--train", action="store_true", help="Also time model.learn() per device type.")
+    parser.add_argument("--train-timesteps", type=int, default=10000)
+    parser.add_argument("--train-device", action="append", help="Device types to time training for. Defaults to all.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to compare against.")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "env": [],
+        "training": [],
+    }
+
+    for wrapper in args.wrapper or ["raw", "dummy", "batched"]:
+        for obs_size, device_type in DEVICES_BY_OBS_SIZE.items():
+            for n_envs in [1] if wrapper == "raw" else args.n_envs or [1, 8, 64]:
+                result = bench_env(wrapper, device_type, n_envs, args.steps, args.repeats, args.seed)
+                results["env"].append(result)
+                print(f"{env_key(result)} (obs {obs_size}): {result['env_steps_per_sec']:,.0f} env steps/sec")
+
+    if args.train:
+        from device_schema import device_types
+        for device_type in args.train_device or device_types():
+            result = bench_training(device_type, args.train_timesteps, args.seed)
+            results["training"].append(result)
+            print(f"train/{device_type}: {result['seconds']:.2f}s for {result['timesteps']} timesteps")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import struct
+
+import numpy as np
+
+# Compact binary format for high-volume /predict and /predict/batch clients,
+# sent with Content-Type application/x-eepb. JSON stays the default.
+#
+# Header (12 bytes, little-endian): magic b"EEPB", version (uint8), length
+# of the device type name (uint8), cols (uint16), rows (uint32).
+#
+# Request:  header, device type name (UTF-8) padded with zero bytes to a
+#           multiple of 4, then rows x cols float32 core values, row-major.
+#           Categorical fields are sent as their codes (e.g. condition Good=75).
+# Response: header with cols = 2 and no name, rows x [sustainability, lifespan]
+#           as float32, then one uint32 suggestion bitmask per row.
+#
+# Values are read with np.frombuffer straight from the request body, so
+# decoding does not copy or parse anything per element.
+
+BINARY_CONTENT_TYPE = "application/x-eepb"
+MAGIC = b"EEPB"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHI")
+FLOAT = np.dtype("<f4")
+CODE = np.dtype("<u4")
+
+
+class BinaryFormatError(ValueError):
+    pass
+
+
+def _padded(n):
+    return (n + 3) & ~3
+
+
+def _read_header(body):
+    if len(body) < HEADER.size:
+        raise BinaryFormatError("Body is shorter than the header")
+    magic, version, name_length, cols, rows = HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise BinaryFormatError("Body does not start with the EEPB magic")
+    if version != VERSION:
+        raise BinaryFormatError(f"Unsupported format version {version}")
+    return name_length, cols, rows
+
+
+def encode_request(device_type, values):
+    # Client side: values is an (N, d) array of encoded core inputs
+    name = device_type.encode("utf-8")
+    values = np.ascontiguousarray(values, dtype=FLOAT).reshape(len(values), -1)
+    header = HEADER.pack(MAGIC, VERSION, len(name), values.shape[1], values.shape[0])
+    return header + name.ljust(_padded(len(name)), b"\0") + values.tobytes()
+
+
+def decode_request(body):
+    # (device_type, read-only (N, d) float32 view of the body)
+    name_length, cols, rows = _read_header(body)
+    offset = HEADER.size + _padded(name_length)
+    if len(body) != offset + rows * cols * FLOAT.itemsize:
+        raise BinaryFormatError(f"Body length does not match {rows} rows of {cols} values")
+    try:
+        device_type = bytes(body[HEADER.size:HEADER.size + name_length]).decode("utf-8")
+    except UnicodeDecodeError:
+        raise BinaryFormatError("Device type is not valid UTF-8")
+    values = np.frombuffer(body, dtype=FLOAT, count=rows * cols, offset=offset).reshape(rows, cols)
+    return device_type, values
+
+
+def encode_response(sustainability, lifespan, codes):
+    results = np.column_stack([sustainability, lifespan]).astype(FLOAT)
+    header = HEADER.pack(MAGIC, VERSION, 0, 2, len(results))
+    return header + results.tobytes() + np.asarray(codes).astype(CODE).tobytes()
+
+
+def decode_response(body):
+    # Client side: ((N, 2) float32 [sustainability, lifespan], (N,) uint32 suggestion bitmasks)
+    _, cols, rows = _read_header(body)
+    if len(body) != HEADER.size + rows * (cols * FLOAT.itemsize + CODE.itemsize):
+        raise BinaryFormatError(f"Body length does not match {rows} results")
+    results = np.frombuffer(body, dtype=FLOAT, count=rows * cols, offset=HEADER.size).reshape(rows, cols)
+    codes = np.frombuffer(body, dtype=CODE, count=rows, offset=HEADER.size + results.nbytes)
+    return results, codes
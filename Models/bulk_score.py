@@ -0,0 +1,222 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from device_schema import FIELD_SPECS, core_fields
+from model_registry import DEFAULT_BACKEND, ModelNotTrainedError
+from scoring import make_env, score_observations
+from suggestion_rules import generate_suggestions_batch
+
+# Usage (from the Models/ directory):
+#   python bulk_score.py inventory.csv scored.csv
+#   python bulk_score.py inventory.parquet scored.ndjson --chunk-size 200000 --workers 8 --backend numpy
+#
+# Scores an inventory file with one device per row and mixed device types.
+# Rows need a device type column and one column per core input field of
+# their device type (the core fields in device_schema); categorical fields
+# such as the condition may be given by option name (New/Good/Fair/Poor).
+# Rows with an absent or empty core field get an error instead of a score.
+# The file is read in chunks, each chunk is split by device type and every
+# group is scored in one batched forward pass in a worker process. Results are written in input order as each chunk finishes,
+# so memory stays bounded by the chunks in flight.
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+_registry = None
+
+
+def format_for(path, fmt=None):
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {path}, pass --input-format/--output-format")
+    return fmt
+
+
+def read_chunks(path, fmt, chunk_size):
+    if fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif fmt == "ndjson":
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq  # Optional, only needed for Parquet files
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+class ResultWriter:
+    # Appends scored chunks to the output file as they complete
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet = None
+        self._file = None if fmt == "parquet" else open(path, "w", newline="")
+
+    def write(self, frame):
+        if self.fmt == "csv":
+            frame = frame.assign(suggestions=frame["suggestions"].map(" | ".join))
+            frame.to_csv(self._file, header=self.rows == 0, index=False)
+        elif self.fmt == "ndjson":
+            self._file.write(frame.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def core_values(frame, fields):
+    # Column-wise FieldSpec.encode: option names map to their code,
+    # anything else that is not a number becomes 0.0. Also returns, per row,
+    # the index of the first core field that is absent or empty (-1 if none).
+    values = np.zeros((len(frame), len(fields)), dtype=np.float32)
+    missing = np.full(len(frame), -1)
+    for j, field in enumerate(fields):
+        if field not in frame:
+            missing[missing < 0] = j
+            continue
+        column = frame[field]
+        missing[(missing < 0) & column.isna().to_numpy()] = j
+        numeric = pd.to_numeric(column, errors="coerce")
+        codes = FIELD_SPECS[field].codes
+        if codes and not pd.api.types.is_numeric_dtype(column):
+            numeric = numeric.fillna(column.astype(str).str.strip().str.lower().map(codes))
+        values[:, j] = numeric.fillna(0.0).to_numpy(dtype=np.float32)
+    return values, missing
+
+
+def init_worker(backend):
+    global _registry
+    try:
+        import torch
+        torch.set_num_threads(1)  # Avoid oversubscribing cores across worker processes
+    except ImportError:  # The NumPy and table backends run without torch
+        pass
+    from model_registry import ModelRegistry
+    _registry = ModelRegistry(make_env, backend=backend)
+
+
+def score_group(device_type, values):
+    # Runs in a worker process: one forward pass and the suggestion rules for one device type
+    model = _registry.get(device_type)
+    _, sustainability, lifespan = score_observations(model, values)
+    return sustainability, lifespan, generate_suggestions_batch(device_type, sustainability, values)
+
+
+def submit_chunk(pool, chunk, device_column, id_column, device_inputs, start_row):
+    device_types = chunk[device_column].astype(str).to_numpy()
+    ids = chunk[id_column].to_numpy() if id_column else np.arange(start_row, start_row + len(chunk))
+    groups = []
+    for device_type in pd.unique(device_types):
+        rows = np.flatnonzero(device_types == device_type)
+        if device_type not in device_inputs:
+            groups.append((rows, None, f"Unknown device type: {device_type}"))
+            continue
+        fields = device_inputs[device_type]
+        values, missing = core_values(chunk.iloc[rows], fields)
+        # Rows without a value for every core field are reported, not scored as 0
+        for j in np.unique(missing[missing >= 0]):
+            groups.append((rows[missing == j], None, f"Missing value for {fields[j]}"))
+        complete = missing < 0
+        if complete.any():
+            groups.append((rows[complete], pool.submit(score_group, device_type, values[complete]), None))
+    return ids, device_types, groups
+
+
+def collect_chunk(ids, device_types, groups):
+    n = len(ids)
+    sustainability = np.full(n, np.nan)
+    lifespan = np.full(n, np.nan)
+    suggestions = [[] for _ in range(n)]
+    errors = [None] * n
+    for rows, future, error in groups:
+        if future is not None:
+            try:
+                group_sustainability, group_lifespan, group_suggestions = future.result()
+            except ModelNotTrainedError as e:
+                error = f"No trained model for {e.device_type}"
+            else:
+                sustainability[rows] = np.round(group_sustainability, 2)
+                lifespan[rows] = np.round(group_lifespan, 2)
+                for row, row_suggestions in zip(rows, group_suggestions):
+                    suggestions[row] = row_suggestions
+        if error is not None:
+            for row in rows:
+                errors[row] = error
+    return pd.DataFrame({
+        "id": ids,
+        "device_type": device_types,
+        "sustainability": sustainability,
+        "lifespan": lifespan,
+        "suggestions": suggestions,
+        "error": errors,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a device inventory file in parallel, chunk by chunk.")
+    parser.add_argument("input", help="Inventory file (.csv, .parquet, .ndjson/.jsonl).")
+    parser.add_argument("output", help="Results file (.csv, .parquet, .ndjson/.jsonl).")
+    parser.add_argument("--input-format", choices=["csv", "parquet", "ndjson"], help="Overrides the input extension.")
+    parser.add_argument("--output-format", choices=["csv", "parquet", "ndjson"], help="Overrides the output extension.")
+    parser.add_argument("--device-column", default="device_type", help="Column holding the device type.")
+    parser.add_argument("--id-column", help="Column copied to the output as id. Defaults to the row number.")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="Rows read per chunk.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of scoring processes.")
+    parser.add_argument("--backend", choices=["sb3", "numpy", "table"], default=DEFAULT_BACKEND,
+                        help="Inference backend used by the workers.")
+    args = parser.parse_args(argv)
+
+    device_inputs = core_fields()
+
+    input_format = format_for(args.input, args.input_format)
+    writer = ResultWriter(args.output, format_for(args.output, args.output_format))
+    start = time.perf_counter()
+    max_in_flight = 2 * args.workers  # Chunks read ahead of the writer
+    pending = deque()
+    rows_read = 0
+    failed = 0
+
+    def write_next():
+        nonlocal failed
+        results = collect_chunk(*pending.popleft())
+        failed += int(results["error"].notna().sum())
+        writer.write(results)
+        print(f"{writer.rows} rows scored ({writer.rows / (time.perf_counter() - start):.0f} rows/s)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(args.backend,)) as pool:
+            for chunk in read_chunks(args.input, input_format, args.chunk_size):
+                if args.device_column not in chunk:
+                    parser.error(f"Missing device type column {args.device_column!r}")
+                pending.append(submit_chunk(pool, chunk, args.device_column, args.id_column, device_inputs, rows_read))
+                rows_read += len(chunk)
+                if len(pending) >= max_in_flight:
+                    write_next()
+            while pending:
+                write_next()
+    finally:
+        writer.close()
+
+    print(f"Finished in {time.perf_counter() - start:.1f}s: {writer.rows} rows written to {args.output}, "
+          f"{failed} could not be scored")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from bulk_score import core_values, read_chunks
+from device_schema import get_schema
+
+# Usage (from the Models/ directory):
+#   python check_bulk_score.py
+#
+# Writes a small inventory CSV whose categorical fields are given by option
+# name, reads it back the way bulk_score.py does and checks the encoded core
+# values: option names (any case, surrounding spaces) map to their codes,
+# numbers pass through, unknown text becomes 0 and empty cells are reported
+# as missing. Exits with status 1 on any mismatch.
+
+INVENTORY = """device_type,Daily Usage (hours),Condition(New/Good/Fair/Poor),Battery Health (%),RAM Size (GB),Device Age (years),Screen Size (inches),"Resolution (e.g., 1080p, 4K)"
+Laptop,5,Good,80,8,2,,
+Laptop,10, new ,60,16,4,,
+Laptop,3,POOR,40,4,6,,
+Laptop,3,50,40,4,6,,
+Laptop,3,Broken,40,4,6,,
+Laptop,3,,40,4,6,,
+Television,,Fair,,,3,55,4K
+Television,,good,,,8,40,1080p
+"""
+
+# device_type -> [(core values, index of the first missing field or -1)]
+EXPECTED = {
+    "Laptop": [
+        ([5, 75, 80, 8, 2], -1),
+        ([10, 100, 60, 16, 4], -1),
+        ([3, 25, 40, 4, 6], -1),
+        ([3, 50, 40, 4, 6], -1),
+        ([3, 0, 40, 4, 6], -1),
+        ([3, 0, 40, 4, 6], 1),
+    ],
+    "Television": [
+        ([55, 100, 3, 50], -1),
+        ([40, 50, 8, 75], -1),
+    ],
+}
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "inventory.csv")
+        with open(path, "w") as f:
+            f.write(INVENTORY)
+        frame = next(read_chunks(path, "csv", 100))
+    for device_type, expected in EXPECTED.items():
+        rows = frame[frame["device_type"] == device_type]
+        values, missing = core_values(rows, get_schema(device_type).fields)
+        for i, (want, want_missing) in enumerate(expected):
+            if not np.array_equal(values[i], np.asarray(want, dtype=np.float32)) or missing[i] != want_missing:
+                failures.append(f"{device_type} row {i}: expected {want} (missing {want_missing}), "
+                                f"got {values[i].tolist()} (missing {missing[i]})")
+    for failure in failures:
+        print(failure)
+    print(f"{sum(len(rows) for rows in EXPECTED.values())} rows: {len(failures)} mismatch(es)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
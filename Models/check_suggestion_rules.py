@@ -0,0 +1,213 @@
+import sys
+
+from suggestion_rules import DEFAULT_SUGGESTION, SUGGESTION_RULES, generate_suggestions, \
+    generate_suggestions_batch, suggestion_codes_batch
+
+# Usage (from the Models/ directory):
+#   python check_suggestion_rules.py
+#
+# Checks the rule table in suggestion_rules.py against the messages the
+# original if/elif generate_suggestions in app.py returned for fixed inputs:
+# every rule firing, every input exactly at its threshold (no rule fires), and
+# every other rule firing. Each case is run through the single-record, batch
+# and bitmask paths. Exits with status 1 on any mismatch, so run it after
+# editing SUGGESTION_RULES; if a change is intended, update the cases here.
+
+# device_type -> [(core inputs, sustainability, expected messages)]
+CASES = {
+    "Smartwatch": [
+        ([17, 75, 49, 4], 49, [
+            "Consider replacing the battery to improve device performance.",
+            "Upgrade to a newer model if the current device is slow or unsupported.",
+            "Reduce daily usage to extend the lifespan and improve sustainability.",
+            "Perform regular maintenance or software updates to enhance sustainability.",
+        ]),
+        ([16, 75, 50, 3], 50, []),
+        ([17, 75, 49, 3], 50, [
+            "Consider replacing the battery to improve device performance.",
+            "Reduce daily usage to extend the lifespan and improve sustainability.",
+        ]),
+    ],
+    "Laptop": [
+        ([11, 75, 39, 7, 6], 60, [
+            "Replace the battery to prevent frequent charging.",
+            "Consider upgrading the RAM for better performance.",
+            "Evaluate if a newer model would be more energy-efficient.",
+            "Optimize daily usage by closing unnecessary programs or lowering screen brightness.",
+        ]),
+        ([10, 75, 40, 8, 5], 60, []),
+        ([10, 75, 39, 8, 6], 60, [
+            "Replace the battery to prevent frequent charging.",
+            "Evaluate if a newer model would be more energy-efficient.",
+        ]),
+    ],
+    "Smartphone": [
+        ([13, 75, 49, 31], 49, [
+            "Replace the battery if the device frequently shuts down.",
+            "Clear unnecessary files or upgrade storage for better performance.",
+            "Reduce screen time to prevent overheating and extend lifespan.",
+            "Regularly update the operating system and apps for improved efficiency.",
+        ]),
+        ([12, 75, 50, 32], 50, []),
+        ([13, 75, 49, 32], 50, [
+            "Replace the battery if the device frequently shuts down.",
+            "Reduce screen time to prevent overheating and extend lifespan.",
+        ]),
+    ],
+    "Tablet": [
+        ([75, 75, 49, 13, 5], 49, [
+            "Replace the battery to improve daily performance.",
+            "Consider using a smaller screen size to save energy.",
+            "Upgrade to a newer model with better energy efficiency.",
+            "Use a screen protector and clean the screen regularly to maintain usability.",
+        ]),
+        ([75, 75, 50, 12, 4], 50, []),
+        ([75, 75, 49, 12, 5], 50, [
+            "Replace the battery to improve daily performance.",
+            "Upgrade to a newer model with better energy efficiency.",
+        ]),
+    ],
+    "Desktop Computer": [
+        ([13, 75, 201, 8], 49, [
+            "Consider upgrading to an energy-efficient power supply unit.",
+            "Upgrade hardware components or consider replacing the device.",
+            "Turn off the device when not in use to save energy.",
+            "Clean the fans and ensure proper ventilation to improve performance.",
+        ]),
+        ([12, 75, 200, 7], 50, []),
+        ([13, 75, 201, 7], 50, [
+            "Consider upgrading to an energy-efficient power supply unit.",
+            "Turn off the device when not in use to save energy.",
+        ]),
+    ],
+    "E-Reader": [
+        ([75, 75, 59, 75, 5], 49, [
+            "Replace the battery to ensure longer reading hours.",
+            "Upgrade to a newer model for improved readability.",
+            "Keep the screen clean and avoid exposing it to extreme conditions.",
+        ]),
+        ([75, 75, 60, 75, 4], 50, []),
+        ([75, 75, 59, 75, 4], 49, [
+            "Replace the battery to ensure longer reading hours.",
+            "Keep the screen clean and avoid exposing it to extreme conditions.",
+        ]),
+    ],
+    "Wearable Fitness Tracker": [
+        ([75, 75, 49, 4999], 49, [
+            "Replace the battery for uninterrupted tracking.",
+            "Increase physical activity to make better use of the tracker.",
+            "Regularly clean the strap and ensure proper syncing with your phone.",
+        ]),
+        ([75, 75, 50, 5000], 50, []),
+        ([75, 75, 49, 5000], 49, [
+            "Replace the battery for uninterrupted tracking.",
+            "Regularly clean the strap and ensure proper syncing with your phone.",
+        ]),
+    ],
+    "Television": [
+        ([75, 49, 8, 75], 49, [
+            "Upgrade to a newer, energy-efficient model.",
+            "Consider upgrading to a higher-resolution TV for better experience.",
+            "Clean the screen regularly and use energy-saving modes.",
+        ]),
+        ([75, 50, 7, 75], 50, []),
+        ([75, 50, 8, 75], 49, [
+            "Upgrade to a newer, energy-efficient model.",
+            "Clean the screen regularly and use energy-saving modes.",
+        ]),
+    ],
+    "Digital Camera": [
+        ([11, 75, 6, 41], 49, [
+            "Consider upgrading to a higher-megapixel camera.",
+            "Evaluate if a newer model with better features would suit your needs.",
+            "Avoid excessive use to prevent overheating and wear.",
+            "Store the camera in a dust-free environment and handle it carefully.",
+        ]),
+        ([12, 75, 5, 40], 50, []),
+        ([11, 75, 5, 41], 50, [
+            "Consider upgrading to a higher-megapixel camera.",
+            "Avoid excessive use to prevent overheating and wear.",
+        ]),
+    ],
+    "Printer": [
+        ([1001, 75, 7], 49, [
+            "Use duplex printing to save paper and reduce wear.",
+            "Consider replacing the printer with an energy-efficient model.",
+            "Clean the ink heads and perform regular maintenance.",
+        ]),
+        ([1000, 75, 6], 50, []),
+        ([1001, 75, 6], 49, [
+            "Use duplex printing to save paper and reduce wear.",
+            "Clean the ink heads and perform regular maintenance.",
+        ]),
+    ],
+    "Scanner": [
+        ([501, 75, 6], 49, [
+            "Avoid scanning unnecessary documents to reduce wear.",
+            "Upgrade to a more efficient scanner.",
+            "Ensure the scanner is properly aligned and cleaned.",
+        ]),
+        ([500, 75, 5], 50, []),
+        ([501, 75, 5], 49, [
+            "Avoid scanning unnecessary documents to reduce wear.",
+            "Ensure the scanner is properly aligned and cleaned.",
+        ]),
+    ],
+    "Smart Home Assistant": [
+        ([11, 75, 6], 49, [
+            "Consider upgrading to the latest version for enhanced features.",
+            "Keep the device clean and ensure software updates are installed.",
+            "Reduce daily usage to save energy.",
+        ]),
+        ([10, 75, 5], 50, []),
+        ([11, 75, 6], 50, [
+            "Consider upgrading to the latest version for enhanced features.",
+            "Reduce daily usage to save energy.",
+        ]),
+    ],
+    "Unknown device": [
+        ([1, 2, 3], 10, [
+            DEFAULT_SUGGESTION,
+        ]),
+    ],
+}
+
+
+def check_device(device_type, cases):
+    failures = []
+    inputs = [user_input for user_input, _, _ in cases]
+    sustainability = [score for _, score, _ in cases]
+    batch = generate_suggestions_batch(device_type, sustainability, inputs)
+    table = SUGGESTION_RULES.get(device_type)
+    messages = [message for _, _, _, message in table["rules"]] if table else []
+    codes = suggestion_codes_batch(device_type, sustainability, inputs).tolist()
+    for i, (user_input, score, expected) in enumerate(cases):
+        results = {
+            "single": generate_suggestions(device_type, score, None, user_input),
+            "batch": batch[i],
+        }
+        if table:
+            results["codes"] = [message for j, message in enumerate(messages) if codes[i] >> j & 1]
+        for path, got in results.items():
+            if got != expected:
+                failures.append(f"{device_type} {user_input} sustainability={score} ({path}): "
+                                f"expected {expected}, got {got}")
+    return failures
+
+
+def main():
+    failures = []
+    for device_type, cases in CASES.items():
+        failures += check_device(device_type, cases)
+    missing = sorted(set(SUGGESTION_RULES) - set(CASES))
+    for device_type in missing:
+        failures.append(f"{device_type}: no cases")
+    for failure in failures:
+        print(failure)
+    n_cases = sum(len(cases) for cases in CASES.values())
+    print(f"{n_cases} cases for {len(CASES)} device types: {len(failures)} mismatch(es)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
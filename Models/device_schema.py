@@ -0,0 +1,169 @@
+import numpy as np
+from gym import spaces
+
+# Single registry of device metadata. Every device type lists its core
+# fields (the model's observation, in order) and the extra descriptive
+# fields the API also accepts. Each field has a dtype, the valid range used
+# by the interactive prompts and request validation and, for categorical
+# fields, the encoding of its options. Schemas are compiled once at import
+# into index arrays, so request inputs are turned into observations with a
+# gather and a few column-wise conversions.
+
+OBSERVATION_LOW = 0.0
+OBSERVATION_HIGH = 100.0
+
+
+class FieldSpec:
+    def __init__(self, label, dtype=float, low=None, high=None, options=None, hint=None):
+        self.label = label
+        self.dtype = dtype
+        self.low = low
+        self.high = high
+        self.options = options  # [(option, code)] for categorical fields
+        self.codes = {option.lower(): float(code) for option, code in options or []}
+        self.hint = hint
+
+    @property
+    def prompt(self):
+        return f"{self.label} ({self.hint}): " if self.hint else f"{self.label}: "
+
+    def encode(self, value):
+        # Scalar fallback for values NumPy cannot convert: option names map to
+        # their code, anything else that is not a number becomes 0.0
+        if isinstance(value, str) and value.strip().lower() in self.codes:
+            return self.codes[value.strip().lower()]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
+
+
+CONDITION = FieldSpec("Condition", str, options=[("New", 100), ("Good", 75), ("Fair", 50), ("Poor", 25)],
+                      hint="New/Good/Fair/Poor")
+
+FIELD_SPECS = {
+    "Daily Usage (hours)": FieldSpec("Daily Usage (hours)", float, 0, 24, hint="0-24"),
+    "Condition(New/Good/Fair/Poor)": CONDITION,
+    "Condition (New/Good/Fair/Poor)": CONDITION,
+    "Battery Health (%)": FieldSpec("Battery Health (%)", float, 0, 100, hint="0-100%"),
+    "RAM Size (GB)": FieldSpec("RAM Size (GB)", float, 1, 128, hint="1-128 GB"),
+    "Storage Size (GB)": FieldSpec("Storage Size (GB)", float, 8, 2048, hint="8-2048 GB"),
+    "Screen Size (inches)": FieldSpec("Screen Size (inches)", float, 5, 100, hint="5-100 inches"),
+    "Device Age (years)": FieldSpec("Device Age (years)", float, 0, 20, hint="0-20 years"),
+    "Power Usage (Watts)": FieldSpec("Power Usage (Watts)", float, 10, 1000, hint="10-1000 Watts"),
+    "Average Daily Steps Tracked": FieldSpec("Average Daily Steps Tracked", int, 0, 50000, hint="0-50000 steps"),
+    "Resolution (e.g., 1080p, 4K)": FieldSpec("Resolution", str, options=[("1080p", 50), ("4K", 100)], hint="1080p/4K"),
+    "Megapixels": FieldSpec("Megapixels", float, 1, 108, hint="1-108 MP"),
+    "Usage (hours per month)": FieldSpec("Usage (hours per month)", float, 0, 720, hint="0-720 hours"),
+    "Monthly Usage (pages printed)": FieldSpec("Monthly Usage (pages printed)", float, 0, 10000, hint="0-10000 pages"),
+    "Monthly Usage (pages scanned)": FieldSpec("Monthly Usage (pages scanned)", float, 0, 10000, hint="0-10000 pages"),
+}
+
+# device_type -> (core fields, extra fields); API inputs are the core fields followed by the extras
+DEVICE_FIELDS = {
+    "Laptop": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "RAM Size (GB)", "Device Age (years)"],
+               ["Brand", "Model", "Storage Size (GB)", "Processor Type", "Operating System"]),
+    "Tablet": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Screen Size (inches)", "Device Age (years)"],
+               ["Brand", "Model", "Storage Size (GB)", "Operating System"]),
+    "Smartphone": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Storage Size (GB)"],
+                   ["Brand", "Model", "RAM Size (GB)", "Operating System", "Device Age (years)"]),
+    "Desktop Computer": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Power Usage (Watts)", "Device Age (years)"],
+                         ["Brand", "Model", "RAM Size (GB)", "Storage Size (GB)", "Processor Type", "Operating System"]),
+    "Smartwatch": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Device Age (years)"],
+                   ["Brand", "Model", "Screen Size (inches)"]),
+    "E-Reader": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Storage Size (GB)", "Device Age (years)"],
+                 ["Brand", "Model", "Screen Type (e.g., e-ink)"]),
+    "Wearable Fitness Tracker": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)", "Average Daily Steps Tracked"],
+                                 ["Brand", "Model", "Heart Rate Monitor (Yes/No)", "Device Age (years)"]),
+    "Television": (["Screen Size (inches)", "Resolution (e.g., 1080p, 4K)", "Device Age (years)", "Condition(New/Good/Fair/Poor)"],
+                   ["Brand", "Model", "Display Technology (LED/LCD/OLED)", "Smart TV (Yes/No)"]),
+    "Digital Camera": (["Megapixels", "Condition (New/Good/Fair/Poor)", "Device Age (years)", "Usage (hours per month)"],
+                       ["Brand", "Model", "Sensor Type (e.g., CMOS)", "Lens Type (Interchangeable/Fixed)"]),
+    "Printer": (["Monthly Usage (pages printed)", "Condition(New/Good/Fair/Poor)", "Device Age (years)"],
+                ["Brand", "Model", "Type (Inkjet/Laser)", "Color Printing (Yes/No)"]),
+    "Scanner": (["Monthly Usage (pages scanned)", "Condition(New/Good/Fair/Poor)", "Device Age (years)"],
+                ["Brand", "Model", "Scan Resolution (DPI)"]),
+    "Smart Home Assistant": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Device Age (years)"],
+                             ["Brand", "Model", "Voice Assistant (e.g., Alexa/Google/Siri)"]),
+    "Headphones": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
+                   ["Brand", "Model", "Type (Wired/Wireless)", "Noise Cancelling (Yes/No)", "Device Age (years)"]),
+    "Wireless/Bluetooth Earbuds": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
+                                   ["Brand", "Model", "Noise Cancelling (Yes/No)", "Device Age (years)"]),
+    "Portable Bluetooth Speaker": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
+                                   ["Brand", "Model", "Waterproof (Yes/No)", "Device Age (years)"]),
+    "Home Theater System": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
+                            ["Brand", "Model", "Number of Speakers", "Power Consumption (Watts)", "Device Age (years)"]),
+    "Soundbar": (["Daily Usage (hours)", "Condition(New/Good/Fair/Poor)", "Battery Health (%)"],
+                 ["Brand", "Model", "Subwoofer Included (Yes/No)", "Bluetooth Enabled (Yes/No)", "Device Age (years)"]),
+}
+
+
+class DeviceSchema:
+    def __init__(self, device_type, core_fields, extra_fields):
+        self.device_type = device_type
+        self.fields = list(core_fields)
+        self.input_fields = self.fields + list(extra_fields)
+        self.n_inputs = len(self.input_fields)
+        self.specs = [FIELD_SPECS[field] for field in self.fields]
+        # Position of every core field in the API input list
+        self.core_index = np.array([self.input_fields.index(field) for field in self.fields], dtype=np.intp)
+        self.low = np.array([-np.inf if spec.low is None else spec.low for spec in self.specs])
+        self.high = np.array([np.inf if spec.high is None else spec.high for spec in self.specs])
+
+    def make_observation_space(self):
+        return spaces.Box(low=OBSERVATION_LOW, high=OBSERVATION_HIGH, shape=(len(self.fields),), dtype=np.float32)
+
+    def encode_core(self, rows):
+        # (N, d) float64 values from rows of core inputs; numeric columns convert
+        # in one step, the rest (option names, bad values) element by element
+        rows = np.asarray(rows, dtype=object).reshape(-1, len(self.fields))
+        values = np.empty(rows.shape, dtype=np.float64)
+        for j, spec in enumerate(self.specs):
+            try:
+                values[:, j] = rows[:, j].astype(np.float64)
+            except (TypeError, ValueError):
+                values[:, j] = [spec.encode(value) for value in rows[:, j]]
+        return values
+
+    def encode(self, rows):
+        # (N, d) core values from rows of the full API input list
+        rows = np.asarray(rows, dtype=object).reshape(-1, self.n_inputs)
+        return self.encode_core(rows[:, self.core_index])
+
+    def validate(self, values):
+        # Checks encoded (N, d) rows against the field ranges in one pass.
+        # Returns (row, message) for the first invalid row, or None.
+        values = np.asarray(values).reshape(-1, len(self.fields))
+        finite = np.isfinite(values)
+        invalid = ~finite | (values < self.low) | (values > self.high)
+        rows = np.flatnonzero(invalid.any(axis=1))
+        if not len(rows):
+            return None
+        row = int(rows[0])
+        j = int(np.flatnonzero(invalid[row])[0])
+        if not finite[row, j]:
+            return row, f"{self.fields[j]} must be a finite number"
+        spec = self.specs[j]
+        return row, f"{self.fields[j]} must be between {spec.low:g} and {spec.high:g}"
+
+    def observations(self, values):
+        return np.clip(values, OBSERVATION_LOW, OBSERVATION_HIGH).astype(np.float32)
+
+
+DEVICE_SCHEMAS = {device_type: DeviceSchema(device_type, core, extra) for device_type, (core, extra) in DEVICE_FIELDS.items()}
+
+
+def get_schema(device_type):
+    schema = DEVICE_SCHEMAS.get(device_type)
+    if schema is None:
+        raise ValueError(f"Unsupported device type: {device_type}")
+    return schema
+
+
+def device_types():
+    return list(DEVICE_SCHEMAS)
+
+
+def core_fields():
+    # device_type -> ordered core field names, the columns of stored records
+    return {device_type: schema.fields for device_type, schema in DEVICE_SCHEMAS.items()}
@@ -0,0 +1,317 @@
+import csv
+import glob
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Storage engines for device records. Every engine appends in O(1) except the
+# legacy Excel one, which rewrites the whole workbook and is kept for
+# compatibility. Records are positional rows matching the device's field list.
+# All engines are safe with several worker processes writing at once.
+
+DATA_DIR = "device_data"
+DEFAULT_ENGINE = os.environ.get("DEVICE_STORE", "csv")
+LOCK_TIMEOUT = float(os.environ.get("DEVICE_STORE_LOCK_TIMEOUT", 30))
+
+
+def merge_same_named(df):
+    # Some legacy workbooks hold the same column twice, once named "0" and once 0,
+    # with each row filled in only one of them; keep the first non-empty value per row
+    names = df.columns.astype(str)
+    if not names.has_duplicates:
+        return df
+    merged = {name: df.loc[:, names == name].bfill(axis=1).iloc[:, 0] for name in dict.fromkeys(names)}
+    return pd.DataFrame(merged, index=df.index)
+
+
+def shard_name(device_type):
+    # Path-safe name for a device type: "Wireless/Bluetooth Earbuds" -> "Wireless_Bluetooth_Earbuds"
+    return re.sub(r"[^A-Za-z0-9-]+", "_", device_type).strip("_")
+
+
+class ShardLock:
+    # Cross-process lock on one shard: an exclusive OS lock (flock, or msvcrt
+    # locking on Windows) on a lock file. The OS releases it when the holder
+    # exits or crashes, so a lock is never broken while its writer is alive,
+    # however long the write takes. The lock file itself stays in place.
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+
+    @staticmethod
+    def _try_lock(fd):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if time.monotonic() > deadline:
+                os.close(fd)
+                raise TimeoutError(f"Timed out waiting for {self.path}")
+            time.sleep(0.01)
+        self._fd = fd
+        return self
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class DeviceStore:
+    def __init__(self, fields, folder=DATA_DIR):
+        self.fields = fields  # device_type -> ordered column names
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def columns_for(self, device_type):
+        if device_type not in self.fields:
+            raise ValueError(f"Unknown device type: {device_type}")
+        return self.fields[device_type]
+
+    def check_row(self, device_type, row):
+        row = [float(value) for value in row]
+        if len(row) != len(self.columns_for(device_type)):
+            raise ValueError(f"Expected {len(self.columns_for(device_type))} values for {device_type}, got {len(row)}")
+        return row
+
+    def append(self, device_type, row):
+        self.append_many(device_type, [row])
+
+    def append_many(self, device_type, rows):
+        raise NotImplementedError
+
+    def read(self, device_type):
+        # Returns a DataFrame with one column per field, or None if there is no data
+        raise NotImplementedError
+
+    def compact(self, device_type):
+        # Rewrites the device type's records in a single compact unit; run with no writers active
+        raise NotImplementedError(f"{type(self).__name__} does not support compaction")
+
+    def read_since(self, device_type, offsets, skip_own=True):
+        # Incremental reads of other processes' records, see CsvDeviceStore
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental reads")
+
+
+class CsvDeviceStore(DeviceStore):
+    # One shard directory per device type holding an append-only CSV segment
+    # per worker process, so writers never share a file; reads merge the segments
+    def __init__(self, fields, folder=DATA_DIR):
+        super().__init__(fields, folder)
+        self._lock = threading.Lock()
+
+    def shard_for(self, device_type):
+        self.columns_for(device_type)
+        return f"{self.folder}/{shard_name(device_type)}"
+
+    def segment_path_for(self, device_type):
+        return f"{self.shard_for(device_type)}/part-{os.getpid()}.csv"
+
+    def append_many(self, device_type, rows):
+        rows = [self.check_row(device_type, row) for row in rows]
+        path = self.segment_path_for(device_type)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer.writerow(self.columns_for(device_type))
+            writer.writerows(rows)
+            # One write per batch keeps a crash from interleaving partial rows
+            with open(path, "a", newline="") as f:
+                f.write(buffer.getvalue())
+
+    def read(self, device_type):
+        paths = sorted(glob.glob(f"{glob.escape(self.shard_for(device_type))}/part-*.csv"))
+        frames = [pd.read_csv(path, dtype="float64", on_bad_lines="skip") for path in paths]
+        frames = [df for df in frames if len(df)]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def read_since(self, device_type, offsets, skip_own=True):
+        # Rows appended to the segments after offsets ({segment path: bytes read})
+        # and the new offsets. Only complete lines are consumed. With skip_own
+        # this process's segment is left out, its rows are already known to the
+        # caller. The offsets are None when a segment shrank or disappeared
+        # (compaction); the caller then has to read everything again.
+        columns = self.columns_for(device_type)
+        own = self.segment_path_for(device_type)
+        paths = set(glob.glob(f"{glob.escape(self.shard_for(device_type))}/part-*.csv"))
+        if any(path not in paths for path in offsets):
+            return None, None
+        offsets = dict(offsets)
+        frames = []
+        for path in sorted(paths):
+            if skip_own and path == own:
+                continue
+            start = offsets.get(path, 0)
+            with open(path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size < start:
+                    return None, None
+                f.seek(start)
+                data = f.read(size - start)
+            end = data.rfind(b"\n") + 1
+            if not end:
+                continue
+            offsets[path] = start + end
+            # A segment's first line is its header
+            df = pd.read_csv(io.StringIO(data[:end].decode("utf-8")), header=None, names=columns,
+                             skiprows=1 if start == 0 else 0, dtype="float64", on_bad_lines="skip")
+            if len(df):
+                frames.append(df)
+        return (pd.concat(frames, ignore_index=True) if frames else None), offsets
+
+    def compact(self, device_type):
+        # Merge every segment into part-compacted.csv, then drop the merged segments
+        shard = self.shard_for(device_type)
+        paths = glob.glob(f"{glob.escape(shard)}/part-*.csv")
+        df = self.read(device_type)
+        if df is None:
+            return 0
+        tmp_path = f"{shard}/.compacted.{os.getpid()}.tmp"
+        df.to_csv(tmp_path, index=False, header=self.columns_for(device_type))
+        os.replace(tmp_path, f"{shard}/part-compacted.csv")
+        for path in paths:
+            if not path.endswith("part-compacted.csv"):
+                os.remove(path)
+        return len(df)
+
+
+class SqliteDeviceStore(DeviceStore):
+    # One table per device type with a REAL column per field, in a single database file
+    def __init__(self, fields, folder=DATA_DIR, filename="device_records.sqlite3"):
+        super().__init__(fields, folder)
+        self.path = f"{folder}/{filename}"
+        self._created = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def quote(name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def connect(self):
+        # WAL lets readers run alongside the single writer; the timeout makes
+        # concurrent writers wait for the database lock instead of failing
+        conn = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def ensure_table(self, conn, device_type):
+        with self._lock:
+            if device_type in self._created:
+                return
+            columns = ", ".join(f"{self.quote(field)} REAL" for field in self.columns_for(device_type))
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.quote(device_type)} ({columns})")
+            self._created.add(device_type)
+
+    def append_many(self, device_type, rows):
+        rows = [self.check_row(device_type, row) for row in rows]
+        placeholders = ", ".join("?" for _ in self.columns_for(device_type))
+        with self.connect() as conn:
+            self.ensure_table(conn, device_type)
+            conn.executemany(f"INSERT INTO {self.quote(device_type)} VALUES ({placeholders})", rows)
+
+    def read(self, device_type):
+        if not os.path.exists(self.path):
+            return None
+        with self.connect() as conn:
+            self.ensure_table(conn, device_type)
+            df = pd.read_sql_query(f"SELECT * FROM {self.quote(device_type)}", conn)
+        return df if len(df) else None
+
+    def compact(self, device_type):
+        df = self.read(device_type)
+        conn = self.connect()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        return 0 if df is None else len(df)
+
+
+class ExcelDeviceStore(DeviceStore):
+    # Legacy format: read-modify-write of the whole workbook on every append.
+    # Each workbook is rewritten under its shard lock and renamed into place.
+    def path_for(self, device_type):
+        self.columns_for(device_type)
+        return f"{self.folder}/{shard_name(device_type)}_data.xlsx"
+
+    @staticmethod
+    def _read_workbook(path, columns):
+        df = merge_same_named(pd.read_excel(path))
+        if list(df.columns) != list(columns):
+            # Workbooks written before the columns were named have numbered
+            # headers; their first columns are the fields in order
+            df = df.iloc[:, :len(columns)].apply(pd.to_numeric, errors="coerce")
+            df.columns = columns[:df.shape[1]]
+        return df
+
+    def append_many(self, device_type, rows):
+        columns = self.columns_for(device_type)
+        new_data = pd.DataFrame([self.check_row(device_type, row) for row in rows], columns=columns)
+        path = self.path_for(device_type)
+        with ShardLock(f"{path}.lock"):
+            if os.path.exists(path):
+                df = self._read_workbook(path, columns)
+                df = pd.concat([df, new_data], ignore_index=True)  # Append new data
+            else:
+                df = new_data  # Create new file if none exists
+            tmp_path = f"{self.folder}/.{shard_name(device_type)}.{os.getpid()}.{threading.get_ident()}.xlsx"
+            df.to_excel(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+    def read(self, device_type):
+        # Workbooks written before shard names were path-safe are read first, never written
+        paths = [f"{self.folder}/{device_type}_data.xlsx", self.path_for(device_type)]
+        paths = [path for i, path in enumerate(paths) if path not in paths[:i] and os.path.isfile(path)]
+        columns = self.columns_for(device_type)
+        frames = [df for df in (self._read_workbook(path, columns) for path in paths) if len(df)]
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+
+ENGINES = {
+    "csv": CsvDeviceStore,
+    "sqlite": SqliteDeviceStore,
+    "excel": ExcelDeviceStore,
+}
+
+
+def get_device_store(fields, engine=DEFAULT_ENGINE, folder=DATA_DIR):
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported device store: {engine}")
+    return ENGINES[engine](fields, folder)
@@ -0,0 +1,170 @@
+import json
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from device_store import ShardLock
+
+# Feedback is stored one JSON record per line in an append-only file. A
+# sidecar index holds the byte offset of every record as a little-endian
+# uint64, so the record count is the index size / 8 and any record can be
+# read with one seek. Appends hold a lock file, so several processes can
+# write at once. The index is only extended after its record is fully
+# written; on open, a torn record at the end of the file is truncated and
+# the index is brought back in line with the data.
+
+OFFSET = struct.Struct("<Q")
+
+
+class FeedbackStore:
+    def __init__(self, path="feedback.jsonl", legacy_path=None):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.lock_path = f"{path}.lock"
+        self._lock = threading.Lock()
+        with self._locked():
+            self._recover()
+            if legacy_path and os.path.exists(legacy_path):
+                self._migrate_legacy(legacy_path)
+
+    @contextmanager
+    def _locked(self):
+        # Threads of this process queue on the mutex; processes on the lock file
+        with self._lock, ShardLock(self.lock_path):
+            yield
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            open(self.path, "ab").close()
+        size = os.path.getsize(self.path)
+
+        # Drop a torn or unparseable record at the end of the data file
+        with open(self.path, "rb+") as f:
+            end = size
+            while end:
+                start = self._line_start(f, end)
+                f.seek(start)
+                line = f.read(end - start)
+                if line.endswith(b"\n") and self._parse(line) is not None:
+                    break
+                end = start
+            if end != size:
+                print(f"Truncating {size - end} bytes of corrupt feedback at the end of {self.path}")
+                f.truncate(end)
+                size = end
+
+        # Keep only index entries that point inside the data, then index any records past them
+        offsets = self._offsets(0, None)
+        valid = int(np.searchsorted(offsets, size))
+        with open(self.index_path, "ab+") as index:
+            if valid * OFFSET.size != os.path.getsize(self.index_path):
+                index.truncate(valid * OFFSET.size)
+            position = 0
+            if valid:
+                with open(self.path, "rb") as f:
+                    f.seek(int(offsets[valid - 1]))
+                    f.readline()
+                    position = f.tell()
+            missing = []
+            with open(self.path, "rb") as f:
+                f.seek(position)
+                for line in f:
+                    missing.append(position)
+                    position += len(line)
+            if missing:
+                print(f"Indexing {len(missing)} feedback records missing from {self.index_path}")
+                index.write(np.asarray(missing, dtype="<u8").tobytes())
+
+    @staticmethod
+    def _line_start(f, end):
+        # Offset where the line ending at `end` starts
+        position = end - 1  # Skip the line's own newline
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                return position - step + newline + 1
+            position -= step
+        return 0
+
+    @staticmethod
+    def _parse(line):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _migrate_legacy(self, legacy_path):
+        # One-off import of the old feedback.json list; the file is kept as *.migrated
+        try:
+            with open(legacy_path, "r") as f:
+                records = json.load(f)
+        except json.JSONDecodeError:
+            print(f"{legacy_path} is not valid JSON, leaving it in place")
+            return
+        self._append(records)
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        print(f"Migrated {len(records)} feedback records from {legacy_path}")
+
+    def _append(self, records):
+        lines = [(json.dumps(record, separators=(",", ":")) + "\n").encode() for record in records]
+        with open(self.path, "ab") as f:
+            position = f.seek(0, os.SEEK_END)
+            f.write(b"".join(lines))
+        offsets = np.cumsum([position] + [len(line) for line in lines[:-1]], dtype=np.uint64)
+        with open(self.index_path, "ab") as index:
+            index.write(offsets.astype("<u8").tobytes())
+
+    def append(self, record):
+        with self._locked():
+            self._append([record])
+
+    def count(self):
+        return os.path.getsize(self.index_path) // OFFSET.size
+
+    def version(self):
+        # Changes whenever a record is appended; used as the ETag of feedback listings
+        return f"{self.count()}-{os.path.getsize(self.path)}"
+
+    def _offsets(self, start, stop):
+        if not os.path.exists(self.index_path):
+            return np.empty(0, dtype="<u8")
+        with open(self.index_path, "rb") as index:
+            index.seek(start * OFFSET.size)
+            data = index.read(-1 if stop is None else (stop - start) * OFFSET.size)
+        return np.frombuffer(data[:len(data) - len(data) % OFFSET.size], dtype="<u8")
+
+    def _read_range(self, start, stop):
+        # Parsed records [start, stop), with None in place of corrupt ones
+        offsets = self._offsets(start, stop + 1)
+        with open(self.path, "rb") as f:
+            f.seek(int(offsets[0]))
+            if len(offsets) > stop - start:
+                data = f.read(int(offsets[-1] - offsets[0]))
+            else:
+                data = f.read()
+        records = [self._parse(line) for line in data.split(b"\n")[:stop - start]]
+        if None in records:
+            print(f"Skipping corrupt feedback records in {self.path}")
+        return records
+
+    def read(self, start=0, limit=None):
+        # Records [start, start + limit) in insertion order
+        stop = self.count() if limit is None else min(start + limit, self.count())
+        if start >= stop:
+            return []
+        return [record for record in self._read_range(start, stop) if record is not None]
+
+    def scan(self, start=0, chunk_size=1000):
+        # Yields (index, record) from start onwards, reading chunk_size records at a time
+        stop = self.count()
+        for chunk_start in range(start, stop, chunk_size):
+            records = self._read_range(chunk_start, min(chunk_start + chunk_size, stop))
+            for index, record in enumerate(records, chunk_start):
+                if record is not None:
+                    yield index, record
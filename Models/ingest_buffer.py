@@ -0,0 +1,148 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+DEFAULT_MAX_QUEUE = int(os.environ.get("INGEST_MAX_QUEUE", 10000))
+DEFAULT_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 500))
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("INGEST_FLUSH_INTERVAL", 1.0))
+DEFAULT_ENQUEUE_TIMEOUT = float(os.environ.get("INGEST_ENQUEUE_TIMEOUT", 0.05))
+DEFAULT_RETRY_BACKOFF = float(os.environ.get("INGEST_RETRY_BACKOFF", 0.5))
+MAX_RETRY_BACKOFF = float(os.environ.get("INGEST_MAX_RETRY_BACKOFF", 30.0))
+
+_STOP = object()
+
+
+class IngestBufferFull(Exception):
+    pass
+
+
+class WriteBehindBuffer:
+    # Bounded queue of device records drained by a background thread that
+    # writes them to the store in per-device-type batches. Flushes when
+    # batch_size records are pending or flush_interval seconds have passed.
+    # While the store is failing the queue is not drained, so it fills up and
+    # enqueue sheds load; failed flushes are retried with exponential backoff.
+    def __init__(self, store, max_queue=DEFAULT_MAX_QUEUE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, enqueue_timeout=DEFAULT_ENQUEUE_TIMEOUT,
+                 retry_backoff=DEFAULT_RETRY_BACKOFF, max_retry_backoff=MAX_RETRY_BACKOFF):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._backoff = retry_backoff
+        self._retry_at = None  # Set while a flush is failing
+        self._stop = threading.Event()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # device_type -> list of rows
+        self._pending_count = 0
+        self._closed = False
+        self.flushed = 0
+        self.failed_flushes = 0
+        self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def enqueue(self, device_type, row):
+        # Backpressure: wait briefly for space, then give up so the caller can shed load
+        if self._closed:
+            raise RuntimeError("Ingest buffer is closed")
+        try:
+            self._queue.put((device_type, list(row)), timeout=self.enqueue_timeout)
+        except queue.Full:
+            raise IngestBufferFull("Ingest queue is full, try again later")
+
+    def _flush(self):
+        failed = False
+        for device_type in list(self._pending):
+            rows = self._pending[device_type]
+            try:
+                self.store.append_many(device_type, rows)
+            except Exception as e:
+                # Keep the rows and retry after the backoff
+                self.failed_flushes += 1
+                failed = True
+                print(f"Failed to flush {len(rows)} {device_type} records, retrying in {self._backoff:.1f}s: {e}")
+                continue
+            del self._pending[device_type]
+            self._pending_count -= len(rows)
+            self.flushed += len(rows)
+
+        if failed:
+            self._retry_at = time.monotonic() + self._backoff
+            self._backoff = min(self._backoff * 2, self.max_retry_backoff)
+        else:
+            self._retry_at = None
+            self._backoff = self.retry_backoff
+
+    def _drain(self):
+        # Move everything still queued into _pending
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _STOP:
+                device_type, row = item
+                self._pending.setdefault(device_type, []).append(row)
+                self._pending_count += 1
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while not self._stop.is_set():
+            if self._retry_at is not None:
+                # The store is failing: leave new records in the bounded queue
+                if self._stop.wait(max(self._retry_at - time.monotonic(), 0)):
+                    break
+                self._flush()
+                last_flush = time.monotonic()
+                continue
+
+            timeout = max(self.flush_interval - (time.monotonic() - last_flush), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                break
+            if item is not None:
+                device_type, row = item
+                self._pending.setdefault(device_type, []).append(row)
+                self._pending_count += 1
+
+            if self._pending_count >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                if self._pending_count:
+                    self._flush()
+                last_flush = time.monotonic()
+
+        # Shutting down: one last attempt to write everything still queued
+        self._drain()
+        if self._pending_count:
+            self._flush()
+        if self._pending_count:
+            print(f"Dropped {self._pending_count} records that could not be flushed on shutdown")
+
+    def close(self):
+        # Flush everything still queued; called on interpreter shutdown
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        try:
+            self._queue.put_nowait(_STOP)  # Wakes the flusher if it is waiting for records
+        except queue.Full:
+            pass
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "pending": self._pending_count,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+            "retrying": self._retry_at is not None,
+        }
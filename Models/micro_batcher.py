@@ -0,0 +1,65 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_WAIT_MS", 2.0))
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64))
+
+
+class MicroBatcher:
+    # Groups concurrent single-observation requests per device type into one
+    # batched evaluation. evaluate(device_type, observations) receives an (N, d)
+    # array and returns a tuple of length-N arrays; row i goes back to request i.
+    def __init__(self, evaluate, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+        self.evaluate = evaluate
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _queue_for(self, device_type):
+        with self._lock:
+            pending = self._queues.get(device_type)
+            if pending is None:
+                pending = queue.Queue()
+                self._queues[device_type] = pending
+                worker = threading.Thread(target=self._run, args=(device_type, pending),
+                                          name=f"micro-batcher-{device_type}", daemon=True)
+                worker.start()
+            return pending
+
+    def submit(self, device_type, observation):
+        future = Future()
+        self._queue_for(device_type).put((np.asarray(observation, dtype=np.float32), future))
+        return future
+
+    def _collect(self, pending):
+        # Block for the first request, then wait at most max_wait for more
+        batch = [pending.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, device_type, pending):
+        while True:
+            batch = self._collect(pending)
+            futures = [future for _, future in batch]
+            try:
+                outputs = self.evaluate(device_type, np.stack([obs for obs, _ in batch]))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for i, future in enumerate(futures):
+                future.set_result(tuple(output[i] for output in outputs))
@@ -0,0 +1,140 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from device_schema import core_fields
+from device_store import DATA_DIR, DEFAULT_ENGINE, get_device_store, merge_same_named, shard_name
+
+# Usage (from the Models/ directory):
+#   python migrate_device_data.py --engine csv
+#   python migrate_device_data.py --engine sqlite --workers 4
+#   python migrate_device_data.py --compact
+#
+# Converts the legacy device_data/*_data.xlsx workbooks into a record store.
+# Workbooks that map to the same device type (e.g. "Desktop Computer_data.xlsx"
+# and "Desktop_Computer_data.xlsx") are merged, columns get the field names
+# from the device schema, and duplicate rows are dropped. Records already in
+# the target store are not written again, so the migration can be re-run.
+
+
+def read_workbook(path):
+    # Runs in a worker process; parsing the xlsx is the slow part
+    start = time.perf_counter()
+    df = pd.read_excel(path)
+    return df, time.perf_counter() - start
+
+
+def device_type_for(path, device_types):
+    stem = os.path.basename(path)[:-len("_data.xlsx")]
+    for device_type in device_types:
+        if shard_name(device_type) == shard_name(stem):
+            return device_type
+    return None
+
+
+def align_columns(df, columns):
+    # Legacy workbooks have integer column names and may carry extra or missing columns
+    df = merge_same_named(df)
+    values = np.full((len(df), len(columns)), np.nan)
+    stored = df.iloc[:, :len(columns)].apply(pd.to_numeric, errors="coerce")
+    values[:, :stored.shape[1]] = stored.to_numpy(dtype=np.float64)
+    aligned = pd.DataFrame(values, columns=columns)
+    return aligned.dropna(how="all")
+
+
+def migrate_device(store, device_type, frames, dedup=True):
+    columns = store.columns_for(device_type)
+    rows_read = sum(len(frame) for frame in frames)
+    df = pd.concat([align_columns(frame, columns) for frame in frames], ignore_index=True)
+    empty = rows_read - len(df)
+    if dedup:
+        df = df.drop_duplicates(ignore_index=True)
+    duplicates = rows_read - empty - len(df)
+
+    # Skip records the target already holds
+    existing = store.read(device_type)
+    if existing is not None and len(df):
+        existing = align_columns(existing, columns).drop_duplicates()
+        merged = df.merge(existing, how="left", on=columns, indicator=True)
+        df = df[(merged["_merge"] == "left_only").to_numpy()]
+
+    if len(df):
+        store.append_many(device_type, df.to_numpy().tolist())
+    return rows_read, empty, duplicates, len(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the legacy device_data workbooks into a record store.")
+    parser.add_argument("--engine", choices=["csv", "sqlite"], default=DEFAULT_ENGINE if DEFAULT_ENGINE != "excel" else "csv",
+                        help="Target storage engine.")
+    parser.add_argument("--source", default=DATA_DIR, help="Folder holding the *_data.xlsx workbooks.")
+    parser.add_argument("--folder", default=DATA_DIR, help="Folder of the target store.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of processes reading workbooks.")
+    parser.add_argument("--keep-duplicates", action="store_true", help="Do not drop duplicate rows.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Afterwards merge each device type's storage into one unit. Stop the API first.")
+    args = parser.parse_args(argv)
+
+    fields = core_fields()
+    store = get_device_store(fields, args.engine, args.folder)
+    start = time.perf_counter()
+
+    paths = sorted(glob.glob(f"{glob.escape(args.source)}/*_data.xlsx"))
+    sources = {}  # device_type -> list of workbook paths
+    for path in paths:
+        device_type = device_type_for(path, fields)
+        if device_type is None:
+            print(f"Skipping {path}: no matching device type")
+            continue
+        sources.setdefault(device_type, []).append(path)
+
+    print(f"Reading {len(paths)} workbook(s) with {args.workers} worker(s)...")
+    frames = {device_type: [] for device_type in sources}
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(read_workbook, path): (device_type, path)
+                   for device_type, device_paths in sources.items() for path in device_paths}
+        for future in as_completed(futures):
+            device_type, path = futures[future]
+            try:
+                df, seconds = future.result()
+            except Exception as e:
+                print(f"{path}: read failed: {e}")
+                failed.append(device_type)
+                continue
+            print(f"{path}: {len(df)} rows read in {seconds:.2f}s")
+            frames[device_type].append(df)
+    read_seconds = time.perf_counter() - start
+
+    totals = [0, 0, 0, 0]
+    for device_type in sorted(sources):
+        if device_type in failed:
+            print(f"{device_type}: skipped because a workbook could not be read")
+            continue
+        device_start = time.perf_counter()
+        counts = migrate_device(store, device_type, frames[device_type], dedup=not args.keep_duplicates)
+        rows_read, empty, duplicates, written = counts
+        totals = [total + count for total, count in zip(totals, counts)]
+        merged = f" (merged {len(sources[device_type])} workbooks)" if len(sources[device_type]) > 1 else ""
+        print(f"{device_type}: {rows_read} rows, {empty} empty rows and {duplicates} duplicates dropped, "
+              f"{written} written in {time.perf_counter() - device_start:.2f}s{merged}")
+
+    if args.compact:
+        compact_start = time.perf_counter()
+        for device_type in fields:
+            store.compact(device_type)
+        print(f"Compacted {len(fields)} device type(s) in {time.perf_counter() - compact_start:.2f}s")
+
+    print(f"Finished in {time.perf_counter() - start:.1f}s (reading took {read_seconds:.1f}s): "
+          f"{totals[0]} rows read, {totals[1]} empty rows and {totals[2]} duplicates dropped, {totals[3]} written to the {args.engine} store")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
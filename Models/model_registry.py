@@ -0,0 +1,215 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from device_schema import device_types
+from device_store import shard_name
+
+MODEL_DIR = "saved_models"
+
+# Default memory budget for loaded policies (bytes). Idle models are evicted
+# least-recently-used first once the budget is exceeded.
+DEFAULT_MAX_BYTES = int(os.environ.get("MODEL_REGISTRY_MAX_BYTES", 64 * 1024 * 1024))
+
+# "sb3" loads the full stable_baselines3 model, "numpy" the exported q_net (no torch),
+# "table" the precomputed action lookup table
+DEFAULT_BACKEND = os.environ.get("INFERENCE_BACKEND", "sb3")
+
+
+def model_file_for(device_type, suffix):
+    # Path-safe file in saved_models/: "Wireless/Bluetooth Earbuds" -> "Wireless_Bluetooth_Earbuds<suffix>"
+    return f"{MODEL_DIR}/{shard_name(device_type)}{suffix}"
+
+
+def model_path_for(device_type):
+    path = model_file_for(device_type, "_model.zip")
+    # Models saved before file names were made path-safe, e.g. "Desktop Computer_model.zip"
+    legacy_path = f"{MODEL_DIR}/{device_type}_model.zip"
+    if not os.path.exists(path) and os.path.exists(legacy_path):
+        return legacy_path
+    return path
+
+
+def available_device_types():
+    # Device types of the schema that have a trained model on disk
+    return sorted(device_type for device_type in device_types() if os.path.exists(model_path_for(device_type)))
+
+
+def model_file_version(device_type):
+    # Changes whenever the saved model is replaced, e.g. by a training job
+    model_path = model_path_for(device_type)
+    if not os.path.exists(model_path):
+        return None
+    return str(os.stat(model_path).st_mtime_ns)
+
+
+def model_file_checksum(device_type):
+    # SHA-256 of the saved model zip; exported policies record it so a
+    # retrained model is never answered from weights exported from the old one
+    model_path = model_path_for(device_type)
+    if not os.path.exists(model_path):
+        return None
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def estimate_model_bytes(model):
+    # Size of the policy weights; that is what stays resident per device type
+    policy = getattr(model, "policy", None)
+    if policy is not None:
+        return sum(p.numel() * p.element_size() for p in policy.parameters())
+    return getattr(model, "nbytes", 0)
+
+
+class ModelNotTrainedError(Exception):
+    # Raised when no trained model exists yet for a device type
+    def __init__(self, device_type):
+        super().__init__(f"No trained model for {device_type} yet.")
+        self.device_type = device_type
+
+
+def load_model(device_type, env_factory):
+    from stable_baselines3 import DQN
+
+    model_path = model_path_for(device_type)
+    if not os.path.exists(model_path):
+        # Training happens in the background (see training_queue.py), never inline
+        raise ModelNotTrainedError(device_type)
+
+    print(f"Loading existing model for {device_type}...")
+    env = env_factory(device_type) if env_factory is not None else None
+    return DQN.load(model_path, env=env)  # Load model with the environment
+
+
+def get_loader(backend):
+    if backend == "sb3":
+        return load_model
+    if backend == "numpy":
+        from numpy_policy import load_numpy_policy
+        return load_numpy_policy
+    if backend == "table":
+        from policy_table import load_policy_table
+        return load_policy_table
+    raise ValueError(f"Unsupported inference backend: {backend}")
+
+
+class ModelRegistry:
+    # Process-wide cache of loaded policies keyed by device type.
+    # env_factory(device_type) builds the (vectorized) environment a model is bound to.
+    def __init__(self, env_factory, max_bytes=DEFAULT_MAX_BYTES, backend=DEFAULT_BACKEND):
+        self.env_factory = env_factory
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.loader = get_loader(backend)
+        self._models = OrderedDict()  # device_type -> (model, nbytes)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._warm = set()
+
+    def _load_lock(self, device_type):
+        with self._lock:
+            return self._load_locks.setdefault(device_type, threading.Lock())
+
+    def _lookup(self, device_type):
+        with self._lock:
+            entry = self._models.get(device_type)
+            if entry is not None:
+                self._models.move_to_end(device_type)
+            return entry
+
+    def get(self, device_type):
+        # Returns the model, loading it on first use
+        entry = self._lookup(device_type)
+        if entry is None:
+            # Only one thread loads a given device type; others wait for it
+            with self._load_lock(device_type):
+                entry = self._lookup(device_type)
+                if entry is None:
+                    model = self.loader(device_type, self.env_factory)
+                    if getattr(model, "version", None) is None:
+                        model.version = model_file_version(device_type)
+                    entry = (model, estimate_model_bytes(model))
+                    self._insert(device_type, entry)
+        return entry[0]
+
+    def _insert(self, device_type, entry):
+        with self._lock:
+            self._models[device_type] = entry
+            self._total_bytes += entry[1]
+            # Evict idle models, but always keep the one just loaded
+            while self._total_bytes > self.max_bytes and len(self._models) > 1:
+                evicted_type, evicted = self._models.popitem(last=False)
+                self._total_bytes -= evicted[1]
+                self._warm.discard(evicted_type)
+                print(f"Evicted model for {evicted_type} from registry")
+
+    def evict(self, device_type):
+        with self._lock:
+            entry = self._models.pop(device_type, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+            self._warm.discard(device_type)
+
+    def warm(self, device_type):
+        # Load the model and run one dummy forward pass so torch kernels are initialized
+        model = self.get(device_type)
+        obs = np.zeros(model.observation_space.shape, dtype=np.float32)
+        model.predict(obs, deterministic=True)
+        with self._lock:
+            if device_type in self._models:
+                self._warm.add(device_type)
+        print(f"Model for {device_type} is warm")
+
+    def warm_up(self, device_types=None, max_workers=None):
+        # Warm every saved model in parallel; returns {device_type: error} for failures
+        if device_types is None:
+            device_types = available_device_types()
+        failures = {}
+        if not device_types:
+            return failures
+        with ThreadPoolExecutor(max_workers=max_workers or len(device_types)) as pool:
+            futures = {device_type: pool.submit(self.warm, device_type) for device_type in device_types}
+        for device_type, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                print(f"Failed to warm model for {device_type}: {error}")
+                failures[device_type] = str(error)
+        return failures
+
+    def warm_device_types(self):
+        with self._lock:
+            return sorted(self._warm)
+
+    def describe(self):
+        with self._lock:
+            return {
+                device_type: {
+                    "model": type(model).__name__,
+                    "version": getattr(model, "version", None),
+                    "bytes": nbytes,
+                    "warm": device_type in self._warm,
+                    "table_disagreement": getattr(model, "disagreement", None),
+                }
+                for device_type, (model, nbytes) in self._models.items()
+            }
+
+    def loaded_device_types(self):
+        with self._lock:
+            return list(self._models)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "loaded": list(self._models),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
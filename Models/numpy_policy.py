@@ -0,0 +1,143 @@
+import os
+import sys
+
+import numpy as np
+from gym import spaces
+
+from model_registry import model_file_checksum, model_file_for, model_path_for
+
+
+def qnet_path_for(device_type):
+    return model_file_for(device_type, "_qnet.npz")
+
+
+class NumpyQPolicy:
+    # Inference-only DQN policy: the q_net MLP evaluated with NumPy matmuls.
+    # Mirrors the parts of the SB3 model API the server uses.
+    def __init__(self, weights, biases, low, high):
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.observation_space = spaces.Box(low=np.asarray(low, dtype=np.float32),
+                                            high=np.asarray(high, dtype=np.float32), dtype=np.float32)
+        self.nbytes = sum(w.nbytes for w in self.weights) + sum(b.nbytes for b in self.biases)
+        self.source = None  # Checksum of the model zip the weights were exported from
+        self.version = None
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            n_layers = int(data["n_layers"])
+            weights = [data[f"W{i}"] for i in range(n_layers)]
+            biases = [data[f"b{i}"] for i in range(n_layers)]
+            policy = cls(weights, biases, data["low"], data["high"])
+            if "source" in data.files:
+                policy.source = str(data["source"])
+                policy.version = policy.source[:16]
+            return policy
+
+    def q_values(self, obs):
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.weights[0].shape[1])
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            # Same layout as torch.nn.Linear: y = x @ W.T + b
+            x = x @ w.T + b
+            if i < last:
+                np.maximum(x, 0, out=x)  # ReLU
+        return x
+
+    def predict(self, obs, deterministic=True):
+        obs = np.asarray(obs, dtype=np.float32)
+        actions = self.q_values(obs).argmax(axis=1)
+        if obs.shape == self.observation_space.shape:
+            return actions[0], None
+        return actions, None
+
+
+def policy_from_sb3(model):
+    # Copy the q_net Linear layers of a loaded SB3 DQN model into a NumpyQPolicy
+    import torch
+
+    layers = [m for m in model.policy.q_net.q_net if isinstance(m, torch.nn.Linear)]
+    activations = [m for m in model.policy.q_net.q_net if not isinstance(m, torch.nn.Linear)]
+    if any(not isinstance(m, torch.nn.ReLU) for m in activations):
+        raise ValueError("Unsupported activation in q_net; only ReLU can be exported.")
+    return NumpyQPolicy([layer.weight.detach().cpu().numpy() for layer in layers],
+                        [layer.bias.detach().cpu().numpy() for layer in layers],
+                        model.observation_space.low, model.observation_space.high)
+
+
+def save_npz(policy, out_path, source):
+    arrays = {"n_layers": np.array(len(policy.weights)),
+              "low": policy.observation_space.low,
+              "high": policy.observation_space.high,
+              "source": np.str_(source)}
+    for i, (w, b) in enumerate(zip(policy.weights, policy.biases)):
+        arrays[f"W{i}"] = w
+        arrays[f"b{i}"] = b
+    np.savez(out_path, **arrays)
+
+
+def export_q_net(device_type, out_path):
+    # Pull the q_net weights out of a saved SB3 DQN zip (needs torch)
+    from stable_baselines3 import DQN
+
+    model_path = model_path_for(device_type)
+    source = model_file_checksum(device_type)
+    model = DQN.load(model_path, device="cpu")
+    save_npz(policy_from_sb3(model), out_path, source)
+    print(f"Exported q_net from {model_path} to {out_path}")
+    return model
+
+
+def count_action_mismatches(model, policy, n_samples=10000, seed=0):
+    # Compare greedy actions of the SB3 model and the NumPy policy on random observations
+    space = policy.observation_space
+    rng = np.random.default_rng(seed)
+    obs = rng.uniform(space.low, space.high, size=(n_samples,) + space.shape).astype(np.float32)
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs, deterministic=True)
+    return int(np.count_nonzero(expected != actual))
+
+
+def load_numpy_policy(device_type, env_factory):
+    # Registry loader for INFERENCE_BACKEND=numpy. Prefers the memory-mapped
+    # policy artifact, then the .npz export, then falls back to the SB3 model.
+    # Exports of an older model than the saved zip are skipped.
+    from model_registry import load_model
+    from policy_artifact import PolicyArtifactError, artifact_path_for, load_policy_artifact
+
+    source = model_file_checksum(device_type)
+    for path, load in ((artifact_path_for(device_type), load_policy_artifact), (qnet_path_for(device_type), NumpyQPolicy.load)):
+        if not os.path.exists(path):
+            continue
+        try:
+            policy = load(path)
+        except PolicyArtifactError as e:
+            print(f"Ignoring {path}: {e}")
+            continue
+        if source is None or policy.source != source:
+            print(f"Ignoring {path}: it was not exported from the current model for {device_type}, re-run the export")
+            continue
+        print(f"Loaded {path} for {device_type}")
+        return policy
+
+    print(f"No current NumPy export for {device_type}, falling back to the SB3 model...")
+    return load_model(device_type, env_factory)
+
+
+def export_all(device_types=None):
+    from model_registry import available_device_types
+
+    failed = False
+    for device_type in device_types or available_device_types():
+        out_path = qnet_path_for(device_type)
+        model = export_q_net(device_type, out_path)
+        mismatches = count_action_mismatches(model, NumpyQPolicy.load(out_path))
+        print(f"{device_type}: {mismatches} action mismatches against the SB3 policy")
+        failed = failed or mismatches > 0
+    return not failed
+
+
+if __name__ == "__main__":
+    # Usage: python numpy_policy.py [device type ...]
+    sys.exit(0 if export_all(sys.argv[1:]) else 1)
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import struct
+import sys
+
+import numpy as np
+
+from model_registry import model_file_checksum, model_file_for, model_path_for
+from numpy_policy import NumpyQPolicy
+
+# Inference-only policy artifact, one per device type. Little-endian layout:
+#
+#   header   magic "EEPOLICY", format version, layer count, observation size,
+#            action count, payload offset, payload size, SHA-256 of the payload,
+#            SHA-256 of the model zip the weights were exported from
+#   dims     (n_layers + 1) uint32 layer widths, obs_dim first
+#   payload  float32: obs low, obs high, then W (out x in) and b (out) per layer,
+#            starting on a 64-byte boundary
+#
+# The payload is memory-mapped read-only, so every worker on a host shares
+# the same page-cache pages and loading costs a header read plus an mmap.
+
+MAGIC = b"EEPOLICY"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIIIQQ32s32s")
+ALIGNMENT = 64
+
+
+class PolicyArtifactError(Exception):
+    pass
+
+
+def artifact_path_for(device_type):
+    return model_file_for(device_type, "_policy.bin")
+
+
+def write_policy_artifact(policy, path, source):
+    dims = [policy.weights[0].shape[1]] + [w.shape[0] for w in policy.weights]
+    arrays = [policy.observation_space.low, policy.observation_space.high]
+    for w, b in zip(policy.weights, policy.biases):
+        arrays += [w, b]
+    payload = b"".join(np.ascontiguousarray(a, dtype="<f4").tobytes() for a in arrays)
+
+    dims_bytes = struct.pack(f"<{len(dims)}I", *dims)
+    offset = HEADER.size + len(dims_bytes)
+    offset += -offset % ALIGNMENT
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(policy.weights), dims[0], dims[-1],
+                         offset, len(payload), hashlib.sha256(payload).digest(), bytes.fromhex(source))
+
+    # Write next to the target and rename, so mapped readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(dims_bytes)
+        f.write(b"\0" * (offset - HEADER.size - len(dims_bytes)))
+        f.write(payload)
+    os.replace(tmp_path, path)
+    print(f"Wrote policy artifact {path} ({offset + len(payload)} bytes)")
+
+
+def load_policy_artifact(path, verify=True):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if header[:len(MAGIC)] != MAGIC:
+            raise PolicyArtifactError(f"{path} is not a policy artifact.")
+        version = struct.unpack_from("<I", header, len(MAGIC))[0]
+        if version != FORMAT_VERSION:
+            raise PolicyArtifactError(f"{path} has unsupported format version {version}.")
+        magic, version, n_layers, obs_dim, n_actions, offset, nbytes, checksum, source = HEADER.unpack(header)
+        dims = struct.unpack(f"<{n_layers + 1}I", f.read(4 * (n_layers + 1)))
+
+    payload = np.memmap(path, dtype="<f4", mode="r", offset=offset, shape=(nbytes // 4,))
+    if verify and hashlib.sha256(payload).digest() != checksum:
+        raise PolicyArtifactError(f"Checksum mismatch in {path}.")
+
+    # Slice views into the mapping; nothing is copied
+    low, high = payload[:obs_dim], payload[obs_dim:2 * obs_dim]
+    pos = 2 * obs_dim
+    weights, biases = [], []
+    for n_in, n_out in zip(dims[:-1], dims[1:]):
+        weights.append(payload[pos:pos + n_out * n_in].reshape(n_out, n_in))
+        pos += n_out * n_in
+        biases.append(payload[pos:pos + n_out])
+        pos += n_out
+
+    policy = NumpyQPolicy(weights, biases, low, high)
+    policy.source = source.hex()
+    policy.version = policy.source[:16]
+    return policy
+
+
+def export_all(device_types=None):
+    from stable_baselines3 import DQN
+    from model_registry import available_device_types
+    from numpy_policy import count_action_mismatches, policy_from_sb3
+
+    failed = False
+    for device_type in device_types or available_device_types():
+        source = model_file_checksum(device_type)
+        model = DQN.load(model_path_for(device_type), device="cpu")
+        path = artifact_path_for(device_type)
+        write_policy_artifact(policy_from_sb3(model), path, source)
+        mismatches = count_action_mismatches(model, load_policy_artifact(path))
+        print(f"{device_type}: {mismatches} action mismatches against the SB3 policy")
+        failed = failed or mismatches > 0
+    return not failed
+
+
+if __name__ == "__main__":
+    # Usage: python policy_artifact.py [device type ...]
+    sys.exit(0 if export_all(sys.argv[1:]) else 1)
@@ -0,0 +1,119 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+from gym import spaces
+
+from model_registry import model_file_checksum, model_file_for
+
+# Precomputed greedy actions over a regular grid of the observation box.
+# The server answers with the action of the nearest grid node, which makes
+# inference a clip, a scale and one fancy-indexing lookup.
+
+DEFAULT_GRID_POINTS = 21  # Step of 5 over the 0-100 observation range
+
+
+def table_path_for(device_type):
+    return model_file_for(device_type, "_table.npz")
+
+
+class PolicyTable:
+    def __init__(self, table, low, high, disagreement=None, source=None):
+        self.table = table
+        self.grid_points = table.shape[0]
+        self.low = np.asarray(low, dtype=np.float32)
+        self.high = np.asarray(high, dtype=np.float32)
+        self.observation_space = spaces.Box(low=self.low, high=self.high, dtype=np.float32)
+        self.scale = (self.grid_points - 1) / (self.high - self.low)
+        self.disagreement = disagreement
+        self.source = source  # Checksum of the model zip the table was built from
+        self.version = source[:16] if source else None
+        self.nbytes = table.nbytes
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            source = str(data["source"]) if "source" in data.files else None
+            return cls(data["table"], data["low"], data["high"], float(data["disagreement"]), source)
+
+    def save(self, path):
+        np.savez(path, table=self.table, low=self.low, high=self.high,
+                 disagreement=np.float64(self.disagreement), source=np.str_(self.source))
+
+    def grid_index(self, obs):
+        obs = np.clip(np.asarray(obs, dtype=np.float32).reshape(-1, self.table.ndim), self.low, self.high)
+        return np.rint((obs - self.low) * self.scale).astype(np.intp)
+
+    def predict(self, obs, deterministic=True):
+        obs = np.asarray(obs, dtype=np.float32)
+        actions = self.table[tuple(self.grid_index(obs).T)].astype(np.int64)
+        if obs.shape == self.observation_space.shape:
+            return actions[0], None
+        return actions, None
+
+
+def build_policy_table(policy, source, grid_points=DEFAULT_GRID_POINTS, n_samples=100000, chunk_size=65536, seed=0):
+    # Evaluate the policy at every grid node, then measure how often the
+    # nearest-node lookup disagrees with the network on random observations
+    low = policy.observation_space.low
+    high = policy.observation_space.high
+    obs_dim = low.shape[0]
+    axes = np.linspace(low, high, grid_points, dtype=np.float32).T  # (obs_dim, grid_points)
+    shape = (grid_points,) * obs_dim
+    table = np.empty(int(np.prod(shape)), dtype=np.uint8)
+    for start in range(0, table.size, chunk_size):
+        flat = np.arange(start, min(start + chunk_size, table.size))
+        index = np.unravel_index(flat, shape)
+        obs = np.stack([axes[d][index[d]] for d in range(obs_dim)], axis=1)
+        table[start:start + len(flat)] = policy.predict(obs, deterministic=True)[0]
+
+    result = PolicyTable(table.reshape(shape), low, high, source=source)
+    rng = np.random.default_rng(seed)
+    samples = rng.uniform(low, high, size=(n_samples, obs_dim)).astype(np.float32)
+    expected = policy.predict(samples, deterministic=True)[0]
+    result.disagreement = float(np.mean(result.predict(samples)[0] != expected))
+    return result
+
+
+def load_policy_table(device_type, env_factory):
+    # Registry loader for INFERENCE_BACKEND=table; falls back to the NumPy backend
+    # when there is no table or it was built from an older model
+    from numpy_policy import load_numpy_policy
+
+    path = table_path_for(device_type)
+    if not os.path.exists(path):
+        print(f"No policy table for {device_type}, falling back to the NumPy policy...")
+        return load_numpy_policy(device_type, env_factory)
+    table = PolicyTable.load(path)
+    source = model_file_checksum(device_type)
+    if source is None or table.source != source:
+        print(f"Ignoring {path}: it was not built from the current model for {device_type}, "
+              f"falling back to the NumPy policy...")
+        return load_numpy_policy(device_type, env_factory)
+    print(f"Loaded policy table for {device_type}")
+    return table
+
+
+def main(argv=None):
+    from model_registry import available_device_types
+    from numpy_policy import load_numpy_policy
+
+    parser = argparse.ArgumentParser(description="Precompute policy lookup tables over the observation space.")
+    parser.add_argument("device", nargs="*", help="Device types to build tables for. Defaults to all saved models.")
+    parser.add_argument("--grid-points", type=int, default=DEFAULT_GRID_POINTS, help="Grid nodes per observation dimension.")
+    parser.add_argument("--samples", type=int, default=100000, help="Random observations used to measure disagreement.")
+    args = parser.parse_args(argv)
+
+    for device_type in args.device or available_device_types():
+        source = model_file_checksum(device_type)
+        policy = load_numpy_policy(device_type, None)  # Only returns exports of the current model
+        table = build_policy_table(policy, source, args.grid_points, args.samples)
+        table.save(table_path_for(device_type))
+        print(f"{device_type}: {table.table.size} cells ({table.nbytes} bytes), "
+              f"disagrees with the network on {table.disagreement:.2%} of the space")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
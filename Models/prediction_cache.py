@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+DEFAULT_TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL", 300))
+DEFAULT_RESOLUTION = float(os.environ.get("PREDICTION_CACHE_RESOLUTION", 0.01))
+
+
+class PredictionCache:
+    # LRU cache with a TTL in front of policy evaluation and suggestions.
+    # Inputs are quantized to `resolution` so near-identical inputs share an entry.
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, resolution=DEFAULT_RESOLUTION):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.resolution = resolution
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def make_key(self, device_type, model_version, user_input):
+        quantized = np.round(np.asarray(user_input, dtype=np.float64) / self.resolution).astype(np.int64)
+        return device_type, model_version, quantized.tobytes()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "resolution": self.resolution,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
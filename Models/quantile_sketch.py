@@ -0,0 +1,413 @@
+import atexit
+import bisect
+import json
+import math
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from device_store import DATA_DIR, DeviceStore, ShardLock, shard_name
+from record_cache import align_rows
+
+# Streaming per-feature statistics for every device type: a KLL quantile
+# sketch (bounded size, mergeable, rank error around 1.7% at k=200) and
+# Welford running moments. Queries cost O(k) no matter how many records
+# were seen.
+#
+# Each device type's statistics live in a JSON file that records which
+# stored rows it covers. With the CSV store that is the byte offset read in
+# every segment: a flush reads the rows appended since then, by any worker,
+# the migration or the CLI, merges them and advances the offsets under the
+# shard lock, so no row is counted twice. The other stores have no offsets;
+# there each process merges a delta of the records it saw, and a delta is
+# dropped if the file was rebuilt since it started, as the rebuild read the
+# stored records itself.
+#
+# A missing file, compacted segments or a record count that does not match
+# the store start a rebuild from every stored record in a background thread,
+# never inside a request; until it finishes the previous statistics are served.
+
+DEFAULT_SKETCH_K = int(os.environ.get("STATS_SKETCH_K", 200))
+DEFAULT_FLUSH_INTERVAL = float(os.environ.get("STATS_FLUSH_INTERVAL", 5.0))
+
+
+class KLLSketch:
+    def __init__(self, k=DEFAULT_SKETCH_K, seed=None):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]  # Items at level h each stand for 2**h inputs
+        self._random = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self):
+        return sum(len(compactor) for compactor in self.compactors)
+
+    def _compress(self):
+        while self._size() > sum(self._capacity(level) for level in range(len(self.compactors))):
+            for level, compactor in enumerate(self.compactors):
+                if len(compactor) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    compactor.sort()
+                    # Keep one item back when the count is odd, promote every other item
+                    kept = [compactor.pop()] if len(compactor) % 2 else []
+                    self.compactors[level + 1].extend(compactor[self._random.randint(0, 1)::2])
+                    compactor[:] = kept
+                    break
+
+    def update(self, value):
+        self.compactors[0].append(float(value))
+        self.n += 1
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values):
+        # Same result as update() per value, filling level 0 a slice at a time
+        values = [float(value) for value in values]
+        i = 0
+        while i < len(values):
+            chunk = values[i:i + max(self._capacity(0) - len(self.compactors[0]), 1)]
+            self.compactors[0].extend(chunk)
+            self.n += len(chunk)
+            i += len(chunk)
+            if len(self.compactors[0]) >= self._capacity(0):
+                self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level].extend(compactor)
+        self.n += other.n
+        self._compress()
+
+    def rank(self, value):
+        # (weight below value, weight at or below value)
+        below = at_or_below = 0
+        for level, compactor in enumerate(self.compactors):
+            items = sorted(compactor)
+            below += bisect.bisect_left(items, value) << level
+            at_or_below += bisect.bisect_right(items, value) << level
+        return below, at_or_below
+
+    def percentile_rank(self, value):
+        # Share of inputs below value, counting ties as half, from 0 to 100
+        if not self.n:
+            return None
+        below, at_or_below = self.rank(value)
+        total = sum(len(compactor) << level for level, compactor in enumerate(self.compactors))
+        return 100.0 * (below + at_or_below) / (2 * total)
+
+    def quantile(self, q):
+        if not self.n:
+            return None
+        weighted = sorted((item, 1 << level) for level, compactor in enumerate(self.compactors) for item in compactor)
+        target = q * sum(weight for _, weight in weighted)
+        cumulative = 0
+        for item, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return item
+        return weighted[-1][0]
+
+    def to_dict(self):
+        return {"k": self.k, "n": self.n, "compactors": self.compactors}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["k"])
+        sketch.n = data["n"]
+        sketch.compactors = [list(compactor) for compactor in data["compactors"]]
+        return sketch
+
+
+class RunningMoments:
+    # Welford's online mean and variance, mergeable with Chan's formula
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = minimum
+        self.max = maximum
+
+    def update(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return cls()
+        mean = float(values.mean())
+        return cls(len(values), mean, float(((values - mean) ** 2).sum()), float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else None
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["count"], data["mean"], data["m2"], data["min"], data["max"])
+
+
+class FeatureStats:
+    def __init__(self, sketch=None, moments=None):
+        self.sketch = sketch or KLLSketch()
+        self.moments = moments or RunningMoments()
+
+    def update(self, value):
+        self.sketch.update(value)
+        self.moments.update(value)
+
+    def update_many(self, values):
+        self.sketch.update_many(values)
+        self.moments.merge(RunningMoments.from_values(values))
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.moments.merge(other.moments)
+
+    def summary(self):
+        return {
+            "count": self.moments.count,
+            "mean": self.moments.mean if self.moments.count else None,
+            "std": self.moments.std(),
+            "min": self.moments.min,
+            "max": self.moments.max,
+            "p25": self.sketch.quantile(0.25),
+            "p50": self.sketch.quantile(0.5),
+            "p75": self.sketch.quantile(0.75),
+        }
+
+    def to_dict(self):
+        return {"sketch": self.sketch.to_dict(), "moments": self.moments.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(KLLSketch.from_dict(data["sketch"]), RunningMoments.from_dict(data["moments"]))
+
+
+def stats_from_rows(columns, values, stats=None):
+    # Adds the finite values of each (N, d) column to its field's statistics
+    stats = stats if stats is not None else {field: FeatureStats() for field in columns}
+    values = np.asarray(values, dtype=np.float64)
+    for j, field in enumerate(columns):
+        column = values[:, j]
+        stats[field].update_many(column[~np.isnan(column)].tolist())
+    return stats
+
+
+class DeviceStats:
+    # Statistics of every device type, kept in memory and persisted to device_data/stats/
+    def __init__(self, record_cache, folder=f"{DATA_DIR}/stats", flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.record_cache = record_cache
+        self.store = record_cache.store
+        self.folder = folder
+        self.flush_interval = flush_interval
+        # Stores with incremental reads let the file track the rows it covers by offset
+        self.incremental = type(self.store).read_since is not DeviceStore.read_since
+        self._views = {}  # device_type -> {field: FeatureStats}, everything known to this process
+        self._generations = {}  # device_type -> id of the rebuild the view's file descends from
+        self._deltas = {}  # device_type -> {field: FeatureStats}, unflushed records (no offsets)
+        self._delta_records = {}  # device_type -> number of records in the delta
+        self._delta_generations = {}  # device_type -> generation the delta builds on
+        self._rebuilding = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        atexit.register(self.flush)
+
+    def path_for(self, device_type):
+        return f"{self.folder}/{shard_name(device_type)}.json"
+
+    def _file_lock(self, device_type):
+        return ShardLock(f"{self.path_for(device_type)}.lock")
+
+    def _read(self, device_type):
+        # The saved file as {"records", "generation", "offsets", "fields": {field: FeatureStats}}, or None
+        path = self.path_for(device_type)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            data = json.load(f)
+        if "fields" not in data:  # Written before the record count was kept
+            return None
+        data.setdefault("generation", None)
+        data["fields"] = {field: FeatureStats.from_dict(feature) for field, feature in data["fields"].items()}
+        return data
+
+    def _write(self, device_type, data):
+        path = self.path_for(device_type)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(data, fields={field: feature.to_dict() for field, feature in data["fields"].items()}), f)
+        os.replace(tmp_path, path)
+
+    def _sync(self, device_type):
+        # Reads the file and, with offsets, merges the rows stored since it was
+        # written. Returns the file's data, or None if it has to be rebuilt.
+        # Call with the file lock held.
+        data = self._read(device_type)
+        if data is None or not self.incremental:
+            return data
+        if "offsets" not in data:
+            return None
+        df, offsets = self.store.read_since(device_type, data["offsets"], skip_own=False)
+        if offsets is None:  # Segments were compacted
+            return None
+        values = align_rows(df, self.store.columns_for(device_type))
+        if len(values) or offsets != data["offsets"]:
+            stats_from_rows(self.store.columns_for(device_type), values, data["fields"])
+            data["records"] += len(values)
+            data["offsets"] = offsets
+            self._write(device_type, data)
+        return data
+
+    def rebuild(self, device_type):
+        # Builds the file from every stored record. This is a full scan; it runs
+        # in a background thread. The scan happens outside the file lock: the
+        # offsets it returns describe exactly the rows it read.
+        columns = self.store.columns_for(device_type)
+        try:
+            df, offsets = self.store.read_since(device_type, {}, skip_own=False)
+        except NotImplementedError:
+            df, offsets = self.store.read(device_type), None
+        values = align_rows(df, columns)
+        stats = stats_from_rows(columns, values)
+        with self._file_lock(device_type):
+            data = {"records": len(values), "generation": os.urandom(8).hex(), "fields": stats}
+            if offsets is not None:
+                data["offsets"] = offsets
+            self._write(device_type, data)
+        with self._lock:
+            self._views[device_type] = stats
+            self._generations[device_type] = data["generation"]
+            self._rebuilding.discard(device_type)
+        print(f"Built statistics for {device_type} from {len(values)} stored records")
+
+    def _start_rebuild(self, device_type):
+        # Call with self._lock held
+        if device_type in self._rebuilding:
+            return
+        self._rebuilding.add(device_type)
+
+        def run():
+            try:
+                self.rebuild(device_type)
+            except Exception as e:
+                print(f"Rebuilding statistics for {device_type} failed: {e}")
+                with self._lock:
+                    self._rebuilding.discard(device_type)
+
+        threading.Thread(target=run, name=f"stats-rebuild-{shard_name(device_type)}", daemon=True).start()
+
+    def _adopt(self, device_type, data):
+        # Serve the file's statistics, or start a rebuild if it is stale. Call with self._lock held
+        stale = data is None
+        if data is not None and not self.incremental and data["records"] != self.record_cache.count(device_type):
+            print(f"Statistics for {device_type} counted {data['records']} records, "
+                  f"the store holds {self.record_cache.count(device_type)}")
+            stale = True
+        if stale:
+            self._start_rebuild(device_type)
+        if data is not None:
+            self._views[device_type] = data["fields"]
+            self._generations[device_type] = data["generation"]
+        else:
+            self._views.setdefault(device_type, {field: FeatureStats() for field in self.store.columns_for(device_type)})
+            self._generations.setdefault(device_type, None)
+        return self._views[device_type]
+
+    def load(self, device_type):
+        with self._lock:
+            view = self._views.get(device_type)
+            if view is None:
+                with self._file_lock(device_type):
+                    data = self._sync(device_type)
+                view = self._adopt(device_type, data)
+            return view
+
+    def update(self, device_type, row):
+        view = self.load(device_type)
+        with self._lock:
+            if not self.incremental:
+                delta = self._deltas.get(device_type)
+                if delta is None:
+                    delta = self._deltas[device_type] = {field: FeatureStats() for field in view}
+                    self._delta_generations[device_type] = self._generations[device_type]
+                self._delta_records[device_type] = self._delta_records.get(device_type, 0) + 1
+            for field, value in zip(view, row):
+                value = float(value)
+                if not math.isnan(value):
+                    view[field].update(value)
+                    if not self.incremental:
+                        delta[field].update(value)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        # Bring each file up to date and refresh the views from it. With offsets
+        # the rows are read back from the store, otherwise the deltas are merged
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if self.incremental:
+                for device_type in list(self._views):
+                    if device_type in self._rebuilding:
+                        continue
+                    with self._file_lock(device_type):
+                        data = self._sync(device_type)
+                    self._adopt(device_type, data)
+                return
+            deltas, self._deltas = self._deltas, {}
+            delta_records, self._delta_records = self._delta_records, {}
+            for device_type, delta in deltas.items():
+                with self._file_lock(device_type):
+                    data = self._read(device_type)
+                    if data is not None and data["generation"] == self._delta_generations[device_type]:
+                        for field, feature in delta.items():
+                            data["fields"][field].merge(feature)
+                        data["records"] += delta_records[device_type]
+                        self._write(device_type, data)
+                if data is not None:
+                    self._views[device_type] = data["fields"]
+                    self._generations[device_type] = data["generation"]
+
+    def describe(self, device_type, user_input=None):
+        # Population summary per field and, if user_input is given, its percentile rank
+        self._maybe_flush()
+        view = self.load(device_type)
+        with self._lock:
+            features = {}
+            for i, (field, feature) in enumerate(view.items()):
+                features[field] = feature.summary()
+                if user_input is not None:
+                    features[field]["value"] = float(user_input[i])
+                    features[field]["percentile"] = feature.sketch.percentile_rank(float(user_input[i]))
+            return features
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_REFRESH_INTERVAL = float(os.environ.get("RECORD_CACHE_REFRESH", 1.0))
+
+
+class DeviceRecordMatrix:
+    # Contiguous float32 records stored column-major, (d, capacity), so each
+    # feature is one contiguous vector; spare capacity keeps appends cheap
+    def __init__(self, columns, values):
+        self.columns = list(columns)
+        self.size = len(values)
+        self.data = np.empty((len(self.columns), max(self.size, 1024)), dtype=np.float32)
+        self.data[:, :self.size] = np.asarray(values, dtype=np.float32).T
+
+    def append(self, row):
+        if self.size == self.data.shape[1]:
+            grown = np.empty((self.data.shape[0], 2 * self.data.shape[1]), dtype=np.float32)
+            grown[:, :self.size] = self.data[:, :self.size]
+            self.data = grown
+        self.data[:, self.size] = row
+        self.size += 1
+
+    def rows(self):
+        # (size, d) view
+        return self.data[:, :self.size].T
+
+    def l1_distances(self, point):
+        # Accumulate |x_j - p_j| column by column in place, avoiding (size, d) temporaries
+        distances = np.empty(self.size, dtype=np.float32)
+        scratch = np.empty(self.size, dtype=np.float32)
+        np.abs(np.subtract(self.data[0, :self.size], point[0], out=distances), out=distances)
+        for j in range(1, len(point)):
+            np.abs(np.subtract(self.data[j, :self.size], point[j], out=scratch), out=scratch)
+            distances += scratch
+        return distances
+
+
+def align_rows(df, columns):
+    # (N, d) float32 values of a stored frame, or (0, d) for None. Legacy files
+    # can carry extra or missing columns; align them positionally
+    if df is None:
+        return np.empty((0, len(columns)), dtype=np.float32)
+    stored = df.iloc[:, :len(columns)].apply(pd.to_numeric, errors="coerce")
+    values = np.full((len(df), len(columns)), np.nan, dtype=np.float32)
+    values[:, :stored.shape[1]] = stored.to_numpy(dtype=np.float32)
+    return values
+
+
+class RecordCache:
+    # In-memory copy of every device type's stored records, loaded from the
+    # store on first use and kept current by append() as this process saves
+    # records. With the CSV store, the rows other worker processes append to
+    # their segments are read incrementally, at most every refresh_interval
+    # seconds. The other stores cannot tell whose rows are new, so there the
+    # cache only sees the records this process saved after loading.
+    def __init__(self, store, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self._matrices = {}
+        self._offsets = {}  # device_type -> segment offsets, for stores with read_since
+        self._refreshed = {}  # device_type -> time of the last read from the store
+        self._lock = threading.Lock()
+
+    def _load(self, device_type):
+        columns = self.store.columns_for(device_type)
+        try:
+            df, self._offsets[device_type] = self.store.read_since(device_type, {}, skip_own=False)
+        except NotImplementedError:
+            df = self.store.read(device_type)
+        self._refreshed[device_type] = time.monotonic()
+        return DeviceRecordMatrix(columns, align_rows(df, columns))
+
+    def _refresh(self, device_type, matrix):
+        # Append the rows other processes stored since the last refresh
+        offsets = self._offsets.get(device_type)
+        if offsets is None or time.monotonic() - self._refreshed[device_type] < self.refresh_interval:
+            return matrix
+        self._refreshed[device_type] = time.monotonic()
+        df, offsets = self.store.read_since(device_type, offsets)
+        if offsets is None:
+            # The segments were compacted underneath us: read everything again
+            matrix = self._load(device_type)
+            self._matrices[device_type] = matrix
+            return matrix
+        self._offsets[device_type] = offsets
+        for row in align_rows(df, matrix.columns):
+            matrix.append(row)
+        return matrix
+
+    def matrix(self, device_type):
+        with self._lock:
+            matrix = self._matrices.get(device_type)
+            if matrix is None:
+                matrix = self._load(device_type)
+                self._matrices[device_type] = matrix
+            else:
+                matrix = self._refresh(device_type, matrix)
+            return matrix
+
+    def append(self, device_type, row):
+        matrix = self.matrix(device_type)
+        with self._lock:
+            matrix.append(np.asarray(row, dtype=np.float32))
+
+    def nearest(self, device_type, user_input):
+        # Index and L1 distance of the closest stored record, or None if there are none
+        matrix = self.matrix(device_type)
+        with self._lock:
+            if not matrix.size:
+                return None
+            distances = matrix.l1_distances(np.asarray(user_input, dtype=np.float32))
+        distances[np.isnan(distances)] = np.inf
+        index = int(distances.argmin())
+        return index, float(distances[index])
+
+    def record(self, device_type, index):
+        matrix = self.matrix(device_type)
+        with self._lock:
+            return pd.Series(matrix.rows()[index].copy(), index=matrix.columns)
+
+    def count(self, device_type):
+        return self.matrix(device_type).size
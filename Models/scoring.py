@@ -0,0 +1,66 @@
+import numpy as np
+import gym
+from gym import spaces
+
+from device_schema import get_schema
+
+# The environment models are bound to and the batched scoring of observations,
+# shared by app.py and bulk_score.py. Importing this module has no side
+# effects, so worker processes can use it without starting the API.
+
+# Define a custom environment for RL
+class ElectronicsEnv(gym.Env):
+    def __init__(self, device_type):
+        super(ElectronicsEnv, self).__init__()
+        self.device_type = device_type
+
+        # Observation shape comes from the device schema; unknown types raise ValueError
+        self.observation_space = get_schema(device_type).make_observation_space()
+
+        # Define action space
+        self.action_space = spaces.Discrete(3)  # 0 = reduce usage, 1 = maintenance, 2 = upgrade
+
+        # Initial state
+        self.state = None
+
+    def seed(self, seed=None):
+        # Episodes draw from the global NumPy random stream
+        np.random.seed(seed)
+        return [seed]
+
+    def reset(self):
+        # Reset state based on device type
+        self.state = np.random.uniform(low=self.observation_space.low, high=self.observation_space.high, size=self.observation_space.shape)
+        return self.state
+
+    def step(self, action):
+        sustainability, lifespan = self.state[:2]
+        if action == 0:  # Reduce usage
+            sustainability += np.random.uniform(1, 5)
+            lifespan += np.random.uniform(0.5, 1.5)
+        elif action == 1:  # Maintenance
+            sustainability += np.random.uniform(3, 8)
+        elif action == 2:  # Upgrade
+            lifespan += np.random.uniform(1, 3)
+
+        sustainability = np.clip(sustainability, 0, 100)
+        lifespan = np.clip(lifespan, 0, 10)  # Ensure lifespan remains in the valid range after updates
+
+        self.state = np.clip(np.array([sustainability, lifespan] + list(self.state[2:])), self.observation_space.low, self.observation_space.high)
+        reward = 0.7 * sustainability + 0.3 * lifespan  # Weighted to prioritize sustainability
+        done = False
+        return self.state, reward, done, {}
+
+
+def make_env(device_type):
+    from stable_baselines3.common.vec_env import DummyVecEnv
+    return DummyVecEnv([lambda: ElectronicsEnv(device_type)])
+
+
+def score_observations(model, observations):
+    # Clip, Q-network forward pass and scoring over an (N, d) array at once
+    obs = np.clip(observations, model.observation_space.low, model.observation_space.high).astype(np.float32)
+    actions, _ = model.predict(obs, deterministic=True)
+    sustainability = obs[:, 0] + 10 * actions
+    lifespan = obs[:, 1] / 10 + 2 * actions  # Dividing by 10 scales condition to a range of 0-10.
+    return obs, sustainability, lifespan
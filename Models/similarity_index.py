@@ -0,0 +1,169 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # Optional: without scipy every query is a brute-force scan
+    cKDTree = None
+
+from device_store import DATA_DIR, shard_name
+
+# Top-k similar-record search over the cached device records. Each device type
+# has a KD-tree over the records present when it was built; records appended
+# since then are scanned brute-force. Once that tail outgrows rebuild_fraction
+# of the tree, the tree is rebuilt and persisted, so restarts reuse it. The
+# persisted index holds only arrays (the tree's points, scale and checksum,
+# saved with np.savez) and the tree is rebuilt from the points on load, so
+# nothing in the index folder is ever unpickled.
+
+DEFAULT_REBUILD_FRACTION = 0.1
+MIN_REBUILD_ROWS = 1000
+
+
+class _DeviceIndex:
+    def __init__(self, n_indexed, scale, checksum, points):
+        # Tree point i is record i
+        self.n_indexed = n_indexed
+        self.scale = scale
+        self.checksum = checksum
+        self.tree = cKDTree(points) if cKDTree is not None and len(points) else None
+
+    def matches(self, rows):
+        # True if the index still covers a prefix of rows
+        return self.n_indexed <= len(rows) and self.checksum == _checksum(rows[:self.n_indexed])
+
+
+def _checksum(rows):
+    return hashlib.sha1(np.ascontiguousarray(rows).tobytes()).hexdigest()
+
+
+class SimilarityIndex:
+    def __init__(self, record_cache, folder=f"{DATA_DIR}/index", rebuild_fraction=DEFAULT_REBUILD_FRACTION):
+        self.record_cache = record_cache
+        self.folder = folder
+        self.rebuild_fraction = rebuild_fraction
+        self._indexes = {}  # (device_type, normalize) -> _DeviceIndex
+        self._sources = {}  # (device_type, normalize) -> record matrix the index was last checked against
+        self._lock = threading.Lock()
+
+    def path_for(self, device_type, normalize):
+        return f"{self.folder}/{shard_name(device_type)}_{'normalized' if normalize else 'raw'}.npz"
+
+    def _build(self, device_type, normalize, rows):
+        scale = np.ones(rows.shape[1], dtype=np.float32)
+        if normalize and len(rows):
+            std = np.nanstd(rows, axis=0)
+            scale = np.where(std > 0, std, 1).astype(np.float32)
+        # Rows with missing values are kept far away and filtered out at query time
+        points = np.nan_to_num(rows / scale, nan=1e30)
+        index = _DeviceIndex(len(rows), scale, _checksum(rows), points)
+
+        # Worker processes can hold the records in different orders, so only
+        # replace a persisted index that covers fewer records than this one or
+        # no longer matches them (the segments were compacted)
+        path = self.path_for(device_type, normalize)
+        persisted = self._read(path, header_only=True)
+        if persisted is None or persisted.n_indexed < index.n_indexed or not persisted.matches(rows):
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, n_indexed=index.n_indexed, scale=index.scale, checksum=index.checksum, points=points)
+            os.replace(tmp_path, path)
+        print(f"Built {'normalized ' if normalize else ''}similarity index for {device_type} over {len(rows)} records")
+        return index
+
+    @staticmethod
+    def _read(path, header_only=False):
+        # The persisted _DeviceIndex, None if missing or unreadable. With header_only
+        # the tree is left out, for checking n_indexed and the checksum
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                points = np.empty((0, 0)) if header_only else data["points"]
+                return _DeviceIndex(int(data["n_indexed"]), data["scale"], str(data["checksum"]), points)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable similarity index {path}: {e}")
+            return None
+
+    def _load(self, device_type, normalize, rows):
+        # Reuse the persisted index if it still matches a prefix of the records
+        index = self._read(self.path_for(device_type, normalize))
+        if index is None or not index.matches(rows):
+            return None
+        return index
+
+    def index_for(self, device_type, normalize, rows, source=None):
+        # source is the record matrix rows come from; a new one (the record
+        # cache reloaded, e.g. after compaction) can hold the records in another
+        # order, so the in-memory index is checked against it before reuse
+        key = (device_type, normalize)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and (source is None or source is not self._sources.get(key)) and not index.matches(rows):
+                index = None
+            if index is None:
+                index = self._load(device_type, normalize, rows)
+            tail = len(rows) - (index.n_indexed if index else 0)
+            if index is None or tail > max(MIN_REBUILD_ROWS, self.rebuild_fraction * index.n_indexed):
+                index = self._build(device_type, normalize, rows)
+            self._indexes[key] = index
+            self._sources[key] = source
+            return index
+
+    def query(self, device_type, point, k=5, normalize=False, filters=None):
+        # Returns [(record index, distance)] of the k nearest records passing the filters
+        matrix = self.record_cache.matrix(device_type)
+        # A view of the current rows stays valid even if later appends reallocate the matrix
+        rows = matrix.rows()
+        allowed = self._filter_mask(matrix.columns, rows, filters) & np.isfinite(rows).all(axis=1)
+        if not len(rows):
+            return []
+        index = self.index_for(device_type, normalize, rows, matrix)
+        point = np.asarray(point, dtype=np.float32) / index.scale
+
+        candidates = []
+        if index.tree is not None and index.n_indexed:
+            # Widen the tree query until k indexed records pass the filters
+            n = min(k, index.n_indexed)
+            while True:
+                distances, ids = index.tree.query(point, k=n)
+                distances, ids = np.atleast_1d(distances), np.atleast_1d(ids)
+                keep = (ids < index.n_indexed) & allowed[np.minimum(ids, len(rows) - 1)]
+                if keep.sum() >= k or n == index.n_indexed:
+                    candidates += zip(ids[keep].tolist(), distances[keep].tolist())
+                    break
+                n = min(n * 4, index.n_indexed)
+            start = index.n_indexed
+        else:
+            start = 0
+
+        # Records not in the tree are scanned directly
+        tail = np.arange(start, len(rows))
+        tail = tail[allowed[tail]]
+        if len(tail):
+            distances = np.sqrt(np.sum((rows[tail] / index.scale - point) ** 2, axis=1))
+            candidates += zip(tail.tolist(), distances.tolist())
+
+        candidates.sort(key=lambda candidate: candidate[1])
+        return candidates[:k]
+
+    @staticmethod
+    def _filter_mask(columns, rows, filters):
+        # filters: {field: value} for equality or {field: {"min": x, "max": y}} for ranges
+        mask = np.ones(len(rows), dtype=bool)
+        for field, condition in (filters or {}).items():
+            if field not in columns:
+                raise ValueError(f"Unknown filter field: {field}")
+            values = rows[:, columns.index(field)]
+            if isinstance(condition, dict):
+                if condition.get("min") is not None:
+                    mask &= values >= float(condition["min"])
+                if condition.get("max") is not None:
+                    mask &= values <= float(condition["max"])
+            else:
+                mask &= values == float(condition)
+        return mask
@@ -0,0 +1,174 @@
+import numpy as np
+
+# Improvement suggestions as a rule table. Each device type names its core
+# inputs in order and lists (input, operator, threshold, message) rules; the
+# pseudo-input "sustainability" is the predicted sustainability score.
+# Messages are returned in rule order for every rule that fires. The tables
+# are compiled into column indices and thresholds, so a whole (N, d) batch is
+# evaluated with a handful of NumPy comparisons.
+
+DEFAULT_SUGGESTION = "Your device seems to be in good condition. Keep up the good maintenance!"
+
+SUGGESTION_RULES = {
+    "Smartwatch": {
+        "inputs": ("usage", "condition", "battery", "age"),
+        "rules": [
+            ("battery", "<", 50, "Consider replacing the battery to improve device performance."),
+            ("age", ">", 3, "Upgrade to a newer model if the current device is slow or unsupported."),
+            ("usage", ">", 16, "Reduce daily usage to extend the lifespan and improve sustainability."),
+            ("sustainability", "<", 50, "Perform regular maintenance or software updates to enhance sustainability."),
+        ],
+    },
+    "Laptop": {
+        "inputs": ("usage", "condition", "battery", "ram", "age"),
+        "rules": [
+            ("battery", "<", 40, "Replace the battery to prevent frequent charging."),
+            ("ram", "<", 8, "Consider upgrading the RAM for better performance."),
+            ("age", ">", 5, "Evaluate if a newer model would be more energy-efficient."),
+            ("usage", ">", 10, "Optimize daily usage by closing unnecessary programs or lowering screen brightness."),
+        ],
+    },
+    "Smartphone": {
+        "inputs": ("usage", "condition", "battery", "storage"),
+        "rules": [
+            ("battery", "<", 50, "Replace the battery if the device frequently shuts down."),
+            ("storage", "<", 32, "Clear unnecessary files or upgrade storage for better performance."),
+            ("usage", ">", 12, "Reduce screen time to prevent overheating and extend lifespan."),
+            ("sustainability", "<", 50, "Regularly update the operating system and apps for improved efficiency."),
+        ],
+    },
+    "Tablet": {
+        "inputs": ("usage", "condition", "battery", "screen_size", "age"),
+        "rules": [
+            ("battery", "<", 50, "Replace the battery to improve daily performance."),
+            ("screen_size", ">", 12, "Consider using a smaller screen size to save energy."),
+            ("age", ">", 4, "Upgrade to a newer model with better energy efficiency."),
+            ("sustainability", "<", 50, "Use a screen protector and clean the screen regularly to maintain usability."),
+        ],
+    },
+    "Desktop Computer": {
+        "inputs": ("usage", "condition", "power_usage", "age"),
+        "rules": [
+            ("power_usage", ">", 200, "Consider upgrading to an energy-efficient power supply unit."),
+            ("age", ">", 7, "Upgrade hardware components or consider replacing the device."),
+            ("usage", ">", 12, "Turn off the device when not in use to save energy."),
+            ("sustainability", "<", 50, "Clean the fans and ensure proper ventilation to improve performance."),
+        ],
+    },
+    "E-Reader": {
+        "inputs": ("usage", "condition", "battery", "storage", "age"),
+        "rules": [
+            ("battery", "<", 60, "Replace the battery to ensure longer reading hours."),
+            ("age", ">", 4, "Upgrade to a newer model for improved readability."),
+            ("sustainability", "<", 50, "Keep the screen clean and avoid exposing it to extreme conditions."),
+        ],
+    },
+    "Wearable Fitness Tracker": {
+        "inputs": ("usage", "condition", "battery", "steps"),
+        "rules": [
+            ("battery", "<", 50, "Replace the battery for uninterrupted tracking."),
+            ("steps", "<", 5000, "Increase physical activity to make better use of the tracker."),
+            ("sustainability", "<", 50, "Regularly clean the strap and ensure proper syncing with your phone."),
+        ],
+    },
+    "Television": {
+        "inputs": ("screen_size", "resolution", "age", "condition"),
+        "rules": [
+            ("age", ">", 7, "Upgrade to a newer, energy-efficient model."),
+            ("resolution", "<", 50, "Consider upgrading to a higher-resolution TV for better experience."),
+            ("sustainability", "<", 50, "Clean the screen regularly and use energy-saving modes."),
+        ],
+    },
+    "Digital Camera": {
+        "inputs": ("megapixels", "condition", "age", "usage"),
+        "rules": [
+            ("megapixels", "<", 12, "Consider upgrading to a higher-megapixel camera."),
+            ("age", ">", 5, "Evaluate if a newer model with better features would suit your needs."),
+            ("usage", ">", 40, "Avoid excessive use to prevent overheating and wear."),
+            ("sustainability", "<", 50, "Store the camera in a dust-free environment and handle it carefully."),
+        ],
+    },
+    "Printer": {
+        "inputs": ("usage", "condition", "age"),
+        "rules": [
+            ("usage", ">", 1000, "Use duplex printing to save paper and reduce wear."),
+            ("age", ">", 6, "Consider replacing the printer with an energy-efficient model."),
+            ("sustainability", "<", 50, "Clean the ink heads and perform regular maintenance."),
+        ],
+    },
+    "Scanner": {
+        "inputs": ("usage", "condition", "age"),
+        "rules": [
+            ("usage", ">", 500, "Avoid scanning unnecessary documents to reduce wear."),
+            ("age", ">", 5, "Upgrade to a more efficient scanner."),
+            ("sustainability", "<", 50, "Ensure the scanner is properly aligned and cleaned."),
+        ],
+    },
+    "Smart Home Assistant": {
+        "inputs": ("usage", "condition", "age"),
+        "rules": [
+            ("age", ">", 5, "Consider upgrading to the latest version for enhanced features."),
+            ("sustainability", "<", 50, "Keep the device clean and ensure software updates are installed."),
+            ("usage", ">", 10, "Reduce daily usage to save energy."),
+        ],
+    },
+}
+
+
+class CompiledRules:
+    def __init__(self, inputs, rules):
+        self.n_inputs = len(inputs)
+        columns = {name: i for i, name in enumerate(inputs)}
+        columns["sustainability"] = len(inputs)  # Appended after the inputs
+        self.columns = np.array([columns[name] for name, _, _, _ in rules], dtype=np.intp)
+        self.less = np.array([op == "<" for _, op, _, _ in rules])
+        self.thresholds = np.array([threshold for _, _, threshold, _ in rules], dtype=np.float64)
+        self.messages = [message for _, _, _, message in rules]
+        self.weights = 1 << np.arange(len(rules))
+        # Suggestion list for every combination of rules that fire, indexed by bitmask
+        self.patterns = [tuple(message for j, message in enumerate(self.messages) if code >> j & 1)
+                         for code in range(1 << len(rules))]
+
+    def masks(self, features, sustainability):
+        # (N, rules) boolean matrix of the rules that fire for each record
+        features = np.asarray(features).reshape(-1, self.n_inputs)
+        operands = np.column_stack([features, np.asarray(sustainability).reshape(-1)])[:, self.columns]
+        return np.where(self.less, operands < self.thresholds, operands > self.thresholds)
+
+    def codes(self, features, sustainability):
+        # Bitmask of the rules that fire for each record; bit j is rule j
+        return self.masks(features, sustainability) @ self.weights
+
+    def suggestions(self, features, sustainability):
+        return [list(self.patterns[code]) for code in self.codes(features, sustainability).tolist()]
+
+
+COMPILED_RULES = {device_type: CompiledRules(table["inputs"], table["rules"])
+                  for device_type, table in SUGGESTION_RULES.items()}
+
+
+def generate_suggestions_batch(device_type, sustainability, features):
+    # Suggestion lists for N records: sustainability has shape (N,), features (N, d)
+    rules = COMPILED_RULES.get(device_type)
+    if rules is None:
+        return [[DEFAULT_SUGGESTION] for _ in range(len(np.asarray(sustainability).reshape(-1)))]
+    return rules.suggestions(features, sustainability)
+
+
+def suggestion_codes_batch(device_type, sustainability, features):
+    # Rule bitmasks for N records, for clients that map them to messages
+    # themselves; device types without rules always get 0
+    rules = COMPILED_RULES.get(device_type)
+    if rules is None:
+        return np.zeros(len(np.asarray(sustainability).reshape(-1)), dtype=np.int64)
+    return rules.codes(features, sustainability)
+
+
+def generate_suggestions(device_type, sustainability, lifespan, user_input):
+    # Single-record form with the signature of the original if/elif implementation
+    rules = COMPILED_RULES.get(device_type)
+    if rules is None:
+        return [DEFAULT_SUGGESTION]
+    if len(user_input) != rules.n_inputs:
+        raise ValueError(f"Expected {rules.n_inputs} inputs for {device_type}, got {len(user_input)}")
+    return rules.suggestions([user_input], [sustainability])[0]
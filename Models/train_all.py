@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from model_registry import MODEL_DIR, model_path_for
+from training_queue import DEFAULT_TIMESTEPS, save_model_atomically, train_model
+
+# Usage (from the Models/ directory):
+#   python train_all.py --timesteps 10000 --seed 0
+#   python train_all.py --device Laptop --device Tablet --device-timesteps Laptop=20000
+
+
+def all_device_types():
+    from device_schema import device_types
+    return device_types()
+
+
+def make_training_env(device_type, env_kind, n_envs):
+    if env_kind == "batched":
+        from vec_env import BatchedElectronicsVecEnv
+        return BatchedElectronicsVecEnv(device_type, num_envs=n_envs)
+
+    from stable_baselines3.common.vec_env import DummyVecEnv
+    from scoring import ElectronicsEnv
+    return DummyVecEnv([lambda: ElectronicsEnv(device_type) for _ in range(n_envs)])
+
+
+def train_device(device_type, total_timesteps, seed, env_kind="batched", n_envs=1):
+    # Runs in a worker process; one device type per core
+    import torch
+
+    torch.set_num_threads(1)  # Avoid oversubscribing cores across worker processes
+    start = time.perf_counter()
+    env = make_training_env(device_type, env_kind, n_envs)
+    model = train_model(device_type, env, total_timesteps, seed=seed, verbose=0)
+    save_model_atomically(model, model_path_for(device_type))
+    return time.perf_counter() - start
+
+
+def parse_device_timesteps(values):
+    budgets = {}
+    for value in values:
+        device_type, sep, timesteps = value.rpartition("=")
+        if not sep or not device_type:
+            raise argparse.ArgumentTypeError(f"Expected DEVICE=TIMESTEPS, got {value!r}")
+        budgets[device_type] = int(timesteps)
+    return budgets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the DQN model for every device type in parallel.")
+    parser.add_argument("--device", action="append", default=[],
+                        help="Device type to train (repeatable). Defaults to all device types.")
+    parser.add_argument("--timesteps", type=int, default=DEFAULT_TIMESTEPS,
+                        help="Default training timesteps per device type.")
+    parser.add_argument("--device-timesteps", action="append", default=[], metavar="DEVICE=TIMESTEPS",
+                        help="Per-device timestep budget (repeatable).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed used for every device type.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes.")
+    parser.add_argument("--env", choices=["batched", "dummy"], default="batched",
+                        help="batched: one BatchedElectronicsVecEnv; dummy: DummyVecEnv over ElectronicsEnv copies.")
+    parser.add_argument("--n-envs", type=int, default=1, help="Number of environments stepped together per device.")
+    parser.add_argument("--skip-existing", action="store_true", help="Skip device types that already have a model.")
+    args = parser.parse_args(argv)
+
+    known = all_device_types()
+    device_types = args.device or known
+    unknown = [device_type for device_type in device_types if device_type not in known]
+    if unknown:
+        parser.error(f"Unknown device type(s): {', '.join(unknown)}")
+    budgets = parse_device_timesteps(args.device_timesteps)
+    if args.skip_existing:
+        device_types = [device_type for device_type in device_types if not os.path.exists(model_path_for(device_type))]
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    print(f"Training {len(device_types)} device type(s) with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(train_device, device_type, budgets.get(device_type, args.timesteps), args.seed,
+                        args.env, args.n_envs): device_type
+            for device_type in device_types
+        }
+        for future in as_completed(futures):
+            device_type = futures[future]
+            try:
+                print(f"{device_type}: trained in {future.result():.1f}s")
+            except Exception as e:
+                print(f"{device_type}: training failed: {e}")
+                failed.append(device_type)
+
+    print(f"Finished in {time.perf_counter() - start:.1f}s, {len(device_types) - len(failed)} succeeded, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
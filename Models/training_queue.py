@@ -0,0 +1,210 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from device_store import ShardLock
+from model_registry import MODEL_DIR, model_file_for
+
+DEFAULT_TIMESTEPS = int(os.environ.get("TRAINING_TIMESTEPS", 10000))
+DEFAULT_TRAINING_WORKERS = int(os.environ.get("TRAINING_WORKERS", 1))
+
+
+def train_model(device_type, env, total_timesteps=DEFAULT_TIMESTEPS, seed=None, callback=None, verbose=1):
+    from stable_baselines3 import DQN
+
+    print(f"Training a new model for {device_type}...")
+    model = DQN("MlpPolicy", env, verbose=verbose, seed=seed)
+    model.learn(total_timesteps=total_timesteps, callback=callback)
+    return model
+
+
+def save_model_atomically(model, model_path):
+    # Write to a temporary file next to the target, then rename over it, so
+    # readers never see a half-written zip
+    tmp_path = f"{model_path}.{os.getpid()}.{threading.get_ident()}.tmp.zip"
+    try:
+        model.save(tmp_path)
+        os.replace(tmp_path, model_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Model saved at {model_path}")
+
+
+def make_progress_callback(job, publish=None, interval=1.0):
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class ProgressCallback(BaseCallback):
+        last_publish = time.monotonic()
+
+        def _on_step(self):
+            job.timesteps_done = self.num_timesteps
+            if publish is not None and time.monotonic() - self.last_publish >= interval:
+                publish(job)
+                self.last_publish = time.monotonic()
+            return True
+
+    return ProgressCallback()
+
+
+class TrainingJob:
+    def __init__(self, device_type, total_timesteps):
+        self.id = uuid.uuid4().hex
+        self.device_type = device_type
+        self.total_timesteps = total_timesteps
+        self.timesteps_done = 0
+        self.status = "queued"  # queued -> running -> done | failed
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data["device_type"], data["total_timesteps"])
+        job.id = data["job_id"]
+        job.timesteps_done = data["timesteps_done"]
+        job.status = data["status"]
+        job.error = data["error"]
+        job.created_at = data["created_at"]
+        job.finished_at = data["finished_at"]
+        return job
+
+    def is_active(self):
+        return self.status in ("queued", "running")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "device_type": self.device_type,
+            "status": self.status,
+            "progress": round(min(self.timesteps_done / self.total_timesteps, 1.0), 4),
+            "timesteps_done": self.timesteps_done,
+            "total_timesteps": self.total_timesteps,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def marker_path_for(device_type):
+    return model_file_for(device_type, "_training.json")
+
+
+class TrainingQueue:
+    # Trains missing models in the background. At most one job per device type
+    # is queued or running at a time, across all worker processes: the process
+    # that trains holds an OS lock on saved_models/<device>_training.lock and
+    # publishes the job to <device>_training.json, where the other workers
+    # read it instead of starting their own run.
+    def __init__(self, env_factory, model_path_for, on_complete=None,
+                 total_timesteps=DEFAULT_TIMESTEPS, max_workers=DEFAULT_TRAINING_WORKERS):
+        self.env_factory = env_factory
+        self.model_path_for = model_path_for
+        self.on_complete = on_complete
+        self.total_timesteps = total_timesteps
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="training")
+        self._jobs = {}
+        self._active = {}  # device_type -> job
+        self._locks = {}  # device_type -> ShardLock held while this process trains it
+        self._lock = threading.Lock()
+
+    def publish(self, job):
+        path = marker_path_for(job.device_type)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def _read_marker(self, path):
+        # Job another process published; if it claims to be active but nobody
+        # holds the lock any more, its process died
+        try:
+            with open(path, "r") as f:
+                job = TrainingJob.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+        if job.is_active() and self._locks.get(job.device_type) is None:
+            try:
+                with ShardLock(f"{path[:-len('.json')]}.lock", timeout=0):
+                    job.status = "failed"
+                    job.error = "The training process exited before finishing"
+            except TimeoutError:
+                pass
+        return job
+
+    def submit(self, device_type):
+        with self._lock:
+            job = self._active.get(device_type)
+            if job is not None and job.is_active():
+                return job
+            marker_path = marker_path_for(device_type)
+            os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+            lock = ShardLock(f"{marker_path[:-len('.json')]}.lock", timeout=0)
+            try:
+                lock.acquire()
+            except TimeoutError:
+                # Another worker process is training this device type
+                job = self._read_marker(marker_path)
+                if job is not None:
+                    return job
+                job = TrainingJob(device_type, self.total_timesteps)
+                job.status = "running"
+                return job
+            job = TrainingJob(device_type, self.total_timesteps)
+            if os.path.exists(self.model_path_for(device_type)):
+                # Finished by another process since the caller looked
+                lock.release()
+                job.status = "done"
+                job.timesteps_done = job.total_timesteps
+                job.finished_at = time.time()
+                return job
+            self._locks[device_type] = lock
+            self._jobs[job.id] = job
+            self._active[device_type] = job
+            self.publish(job)
+        self._executor.submit(self._run, job)
+        print(f"Queued training job {job.id} for {device_type}")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        # Jobs of other worker processes
+        for path in glob.glob(f"{glob.escape(MODEL_DIR)}/*_training.json"):
+            job = self._read_marker(path)
+            if job is not None and job.id == job_id:
+                return job
+        return None
+
+    def _run(self, job):
+        job.status = "running"
+        try:
+            self.publish(job)
+            env = self.env_factory(job.device_type)
+            model = train_model(job.device_type, env, job.total_timesteps,
+                                callback=make_progress_callback(job, self.publish))
+            save_model_atomically(model, self.model_path_for(job.device_type))
+            job.status = "done"
+        except Exception as e:
+            print(f"Training job {job.id} for {job.device_type} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self.publish(job)
+            with self._lock:
+                self._locks.pop(job.device_type).release()
+
+        if job.status == "done" and self.on_complete is not None:
+            # The model is saved; a failed warm-up does not fail the job
+            try:
+                self.on_complete(job.device_type)
+            except Exception as e:
+                print(f"Warm-up after training {job.device_type} failed: {e}")
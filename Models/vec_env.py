@@ -0,0 +1,85 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from scoring import ElectronicsEnv
+
+
+class BatchedElectronicsVecEnv(VecEnv):
+    # N copies of ElectronicsEnv stepped together. All state lives in one
+    # preallocated (N, d) array and actions, clipping and rewards are applied
+    # as array operations. Each env has its own seeded np.random.Generator;
+    # uniforms are drawn in blocks of buffer_size steps to keep per-step cost flat.
+    def __init__(self, device_type, num_envs=8, seed=None, buffer_size=1024):
+        template = ElectronicsEnv(device_type).observation_space
+        observation_space = spaces.Box(low=template.low, high=template.high, dtype=np.float32)
+        super().__init__(num_envs, observation_space, spaces.Discrete(3))
+        self.device_type = device_type
+        self.low = observation_space.low
+        self.high = observation_space.high
+        self.buffer_size = buffer_size
+        self.state = np.zeros((num_envs,) + observation_space.shape, dtype=np.float32)
+        self._uniforms = np.empty((num_envs, buffer_size, 2), dtype=np.float32)
+        self._cursor = buffer_size
+        self._actions = np.zeros(num_envs, dtype=np.int64)
+        self._dones = np.zeros(num_envs, dtype=bool)
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        # One independent stream per env, derived from a single seed
+        children = np.random.SeedSequence(seed).spawn(self.num_envs)
+        self._generators = [np.random.default_rng(child) for child in children]
+        self._cursor = self.buffer_size
+        return [seed] * self.num_envs
+
+    def _next_uniforms(self):
+        if self._cursor == self.buffer_size:
+            for i, generator in enumerate(self._generators):
+                self._uniforms[i] = generator.random((self.buffer_size, 2), dtype=np.float32)
+            self._cursor = 0
+        uniforms = self._uniforms[:, self._cursor]
+        self._cursor += 1
+        return uniforms
+
+    def reset(self):
+        for i, generator in enumerate(self._generators):
+            self.state[i] = generator.uniform(self.low, self.high)
+        self._cursor = self.buffer_size
+        return self.state.copy()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        u = self._next_uniforms()
+        actions = self._actions
+        sustainability = self.state[:, 0]
+        lifespan = self.state[:, 1]
+
+        # 0 = reduce usage, 1 = maintenance, 2 = upgrade
+        sustainability += np.where(actions == 0, 1 + 4 * u[:, 0], np.where(actions == 1, 3 + 5 * u[:, 0], 0))
+        lifespan += np.where(actions == 0, 0.5 + u[:, 1], np.where(actions == 2, 1 + 2 * u[:, 0], 0))
+
+        np.clip(sustainability, 0, 100, out=sustainability)
+        np.clip(lifespan, 0, 10, out=lifespan)
+        np.clip(self.state, self.low, self.high, out=self.state)
+
+        rewards = 0.7 * sustainability + 0.3 * lifespan  # Weighted to prioritize sustainability
+        infos = [{} for _ in range(self.num_envs)]
+        return self.state.copy(), rewards.astype(np.float32), self._dones.copy(), infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]